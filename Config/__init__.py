@@ -6,12 +6,19 @@ __all__ = [
     # ZK配置
     "ZK_SERVERS", "ZK_SESSION_TIMEOUT", "ZK_BASE_PATH", 
     "ZK_NODES_PATH", "ZK_SHARDS_PATH", "ZK_SINGLETON_KEY",
+    "ZK_HEALTH_CHECK_INTERVAL", "ZK_NODE_REFRESH_DEBOUNCE",
     # RPC配置
     "COORDINATOR_DEFAULT_PORT", "DATANODE_DEFAULT_PORT_START",
-    "RPC_BUFFER_SIZE", "RPC_TIMEOUT", "RPC_POOL_SIZE", "RPC_POOL_IDLE_TIMEOUT",
+    "RPC_BUFFER_SIZE", "RPC_TIMEOUT", "RPC_POOL_SIZE", "RPC_POOL_IDLE_TIMEOUT", "RPC_POOL_MIN_SIZE",
+    "PUT_COALESCE_MAX_BATCH", "PUT_COALESCE_MAX_WAIT_MS",
+    "SEARCH_FANOUT_WORKERS", "SEARCH_OVERFETCH_MAX", "SEARCH_CACHE_SIZE", "SEARCH_CACHE_TTL",
     # 存储配置
-    "VECTOR_DIM", "SHARD_COUNT", "REPLICA_COUNT",
-    "WAL_BASE_DIR", "WAL_ROTATE_SIZE",
+    "VECTOR_DIM", "SHARD_COUNT", "REPLICA_COUNT", "SHARD_HASH",
+    "WAL_BASE_DIR", "WAL_ROTATE_SIZE", "CHECKPOINT_INTERVAL", "CHECKPOINT_KEEP_N",
+    "WAL_SEGMENT_COMPRESSION", "WAL_REPLAY_BATCH_SIZE",
+    "NODE_PUT_COALESCE_MAX_BATCH", "NODE_PUT_COALESCE_MAX_WAIT_MS",
+    "LEVELDB_WRITE_BUFFER_SIZE", "LEVELDB_MAX_OPEN_FILES", "LEVELDB_BLOCK_SIZE",
+    "LEVELDB_BLOOM_FILTER_BITS", "LEVELDB_LRU_CACHE_SIZE", "NODE_META_CACHE_SIZE",
     "RAW_STORAGE_TYPE", "RAW_STORAGE_CONFIG",
-    "FAISS_HNSW_M", "FAISS_EF_CONSTRUCTION", "FAISS_EF_SEARCH"
+    "HNSW_SPACE", "HNSW_M", "HNSW_EF_CONSTRUCTION", "HNSW_EF_SEARCH", "HNSW_MAX_ELEMENTS"
 ]
\ No newline at end of file
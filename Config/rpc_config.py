@@ -6,4 +6,15 @@ RPC_TIMEOUT = 20000  # RPC调用超时（ms）
 
 # RPC连接池配置
 RPC_POOL_SIZE = 10  # 每个数据节点最大连接数
-RPC_POOL_IDLE_TIMEOUT = 30  # 空闲连接超时（s）
\ No newline at end of file
+RPC_POOL_IDLE_TIMEOUT = 30  # 空闲连接超时（s）
+RPC_POOL_MIN_SIZE = 2  # 每个数据节点预热的最小连接数（注册时建好，检索热路径无需握手）
+
+# 协调节点写入合并配置：同一主节点的并发单条PUT合并为一次put_batch
+PUT_COALESCE_MAX_BATCH = 64  # 单次合并的最大条数
+PUT_COALESCE_MAX_WAIT_MS = 2  # 首条写入后最多等待多久再发送（ms），单条写入延迟最多增加该值
+
+# 协调节点检索配置
+SEARCH_FANOUT_WORKERS = 16  # 广播检索的并发线程数（各数据节点并行查询）
+SEARCH_OVERFETCH_MAX = 50  # 多节点时每个节点额外多取的结果数上限（吸收跨节点重复key，合并后仍能凑满top_k）
+SEARCH_CACHE_SIZE = 4096  # 检索结果缓存条数（LRU淘汰）
+SEARCH_CACHE_TTL = 30  # 检索结果缓存有效期（s）；经本协调节点的写入/删除会立即使缓存失效
@@ -2,10 +2,27 @@
 VECTOR_DIM = 512  # CLIP-ViT-B/32默认512维
 SHARD_COUNT = 4   # 分片数量
 REPLICA_COUNT = 2 # 副本数量
+SHARD_HASH = "md5"  # key→分片的哈希算法：md5 / xxh3（需安装xxhash）；切换会改变已有key的分片归属，需在空集群上修改
 
 # WAL配置
 WAL_BASE_DIR = "./Static/wal"
 WAL_ROTATE_SIZE = 1024 * 1024 * 100  # 100MB日志轮转
+CHECKPOINT_INTERVAL = 2000  # 每累计多少次写入/删除保存一次快照（两次快照之间的持久性由WAL保证）
+CHECKPOINT_KEEP_N = 3  # 保留的最新快照个数，更早的快照在新快照保存后删除
+WAL_SEGMENT_COMPRESSION = None  # 已轮转WAL段的压缩：None（不压缩）/ "zstd"（需安装zstandard；向量为float32，压缩收益主要来自key与元数据）
+WAL_REPLAY_BATCH_SIZE = 4096  # WAL重放时每次put_batch/delete_batch的最大条数（限制单批向量矩阵的内存）
+
+# 数据节点写入合并配置：并发到达的单条PUT合并为一次本地put_batch（一次add_items）
+NODE_PUT_COALESCE_MAX_BATCH = 512  # 单次合并的最大条数
+NODE_PUT_COALESCE_MAX_WAIT_MS = 2  # 首条写入后最多等待多久再写入索引（ms）
+
+# 数据节点LevelDB配置
+LEVELDB_WRITE_BUFFER_SIZE = 128 * 1024 * 1024  # memtable大小，写入突发时减少flush/compaction次数
+LEVELDB_MAX_OPEN_FILES = 1024
+LEVELDB_BLOCK_SIZE = 16 * 1024
+LEVELDB_BLOOM_FILTER_BITS = 10  # 每个key的布隆过滤器位数，不存在的key点查无需读数据块
+LEVELDB_LRU_CACHE_SIZE = 256 * 1024 * 1024  # 数据块缓存大小
+NODE_META_CACHE_SIZE = 65536  # 检索结果元数据LRU缓存条数（hnsw_id -> metadata，命中时不读LevelDB、不解码）
 
 # 原始数据存储配置
 RAW_STORAGE_TYPE = "sqlite"  # 默认存储类型：file/sqlite/mysql
@@ -21,7 +38,9 @@ RAW_STORAGE_CONFIG = {
     }
 }
 
-# Faiss索引配置
-FAISS_HNSW_M = 16          # HNSW邻居数
-FAISS_EF_CONSTRUCTION = 40 # 构建时EF值
-FAISS_EF_SEARCH = 64       # 检索时EF值
\ No newline at end of file
+# HNSW索引配置（hnswlib）
+HNSW_SPACE = "l2"               # 距离空间：l2 / ip（写入与查询向量先归一化，等价于余弦）；已有索引文件的空间不可更改
+HNSW_M = 32                     # 每个节点的邻居数
+HNSW_EF_CONSTRUCTION = 128      # 构建时EF值
+HNSW_EF_SEARCH = 64             # 检索时默认EF值（SearchRequest.ef_search可按请求覆盖）
+HNSW_MAX_ELEMENTS = 1000000     # 新建索引的初始容量
\ No newline at end of file
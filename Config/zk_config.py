@@ -4,6 +4,8 @@ ZK_SESSION_TIMEOUT = 30000  # 会话超时时间（ms）
 ZK_BASE_PATH = "/vector_db"
 ZK_NODES_PATH = f"{ZK_BASE_PATH}/nodes"
 ZK_SHARDS_PATH = f"{ZK_BASE_PATH}/shards"
+ZK_HEALTH_CHECK_INTERVAL = 30  # 节点端口探测间隔（s）；节点上下线由ZK临时节点+监听实时感知，探测只作兜底
+ZK_NODE_REFRESH_DEBOUNCE = 0.1  # 节点目录变化后等待多久再刷新节点缓存（s），窗口内的多次变化合并为一次刷新
 
 # 单例ZK连接标识
 ZK_SINGLETON_KEY = "vector_db_zk_singleton"
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import hashlib
+import threading
+import numpy as np
+from loguru import logger
+
+# 缓存目录：项目根目录下的Static/clip_emb_cache（按哈希前2位分子目录，避免单目录文件过多）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(PROJECT_ROOT, "Static/clip_emb_cache")
+HASH_CHUNK_SIZE = 1 << 20  # 文件分块哈希的块大小（1MB）
+
+_stats = {"hit": 0, "miss": 0}
+_stats_lock = threading.Lock()
+
+
+def text_hash(text: str, namespace: str = "") -> str:
+    """文本内容哈希（namespace区分模型，换模型后旧缓存自动失效）"""
+    return hashlib.sha256(f"{namespace}\x00text\x00{text}".encode("utf-8")).hexdigest()
+
+
+def bytes_hash(data: bytes, namespace: str = "") -> str:
+    """图片字节内容哈希"""
+    h = hashlib.sha256(f"{namespace}\x00image\x00".encode("utf-8"))
+    h.update(data)
+    return h.hexdigest()
+
+
+def file_hash(file_path: str, namespace: str = "") -> str:
+    """图片文件内容哈希（分块读取，不整体加载到内存）"""
+    h = hashlib.sha256(f"{namespace}\x00image\x00".encode("utf-8"))
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.npy")
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+        logger.debug(f"嵌入缓存{name}：hit={_stats['hit']}，miss={_stats['miss']}")
+
+
+def get(key: str) -> np.ndarray:
+    """
+    查询缓存
+    :param key: 内容哈希
+    :return: 向量，未命中返回None
+    """
+    try:
+        vec = np.load(_cache_path(key))
+    except (FileNotFoundError, ValueError, OSError):
+        _count("miss")
+        return None
+    _count("hit")
+    return vec
+
+
+def put(key: str, vec):
+    """
+    写入缓存（先写临时文件再原子替换，并发写同一KEY也不会产生半截文件）
+    :param key: 内容哈希
+    :param vec: 向量（列表或ndarray）
+    """
+    path = _cache_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(vec, dtype=np.float32))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"嵌入缓存写入失败：{e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def stats() -> dict:
+    """缓存命中统计"""
+    with _stats_lock:
+        return dict(_stats)
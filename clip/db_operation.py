@@ -1,5 +1,8 @@
 import os
 import sys
+import queue
+import threading
+import numpy as np
 from loguru import logger
 
 # 添加项目根目录到sys.path
@@ -7,15 +10,22 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
 # 项目内部导入
-from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
 from src.vector_db.CoordinatorService import Client as CoordinatorClient
 from src.vector_db.ttypes import VectorData, SearchRequest, Response
+from src.utils.vector_utils import pack_vector
+from src.utils.rpc_utils import create_rpc_client
 # 导入CLIP嵌入工具
 from clip.embedding import CLIPEmbedding, SUPPORTED_IMAGE_EXT
 
 COORDINATOR_HOST="192.168.14.149"
 COORDINATOR_PORT="8081"
+# 入库向量的传输编码（float32/float16/int8）。数据节点存储的是解码后的向量，有损编码会永久保留量化误差：
+# float16误差可忽略；int8（每维步长1/127）会降低近邻召回，仅在确认召回损失可接受时显式开启以减少拷贝与网络字节
+VECTOR_WIRE_DTYPE = "float32"
+IMPORTED_KEYS_PATH = os.path.join(PROJECT_ROOT, "Static/imported_keys.txt")  # 断点续传：已入库的KEY
+IMAGE_EXT_TUPLE = tuple(SUPPORTED_IMAGE_EXT)
+PUT_WRITER_COUNT = 4  # 批量入库的写入线程数（每个线程独占一个连接）
+PUT_QUEUE_SIZE = 64   # 编码线程与写入线程之间的有界队列长度
 
 class VectorDBOperation:
     """向量库操作类（存储+检索）"""
@@ -26,15 +36,16 @@ class VectorDBOperation:
         self.clip = CLIPEmbedding()  # 初始化CLIP嵌入工具
         self._init_db_client()
 
+    def _create_db_client(self):
+        """新建一个协调节点客户端连接"""
+        client, transport = create_rpc_client(CoordinatorClient, self.coord_addr)
+        transport.open()
+        return client, transport
+
     def _init_db_client(self):
         """初始化向量库客户端"""
         try:
-            host, port = self.coord_addr.split(":")
-            self.transport = TSocket.TSocket(host, int(port))
-            self.transport = TTransport.TBufferedTransport(self.transport)
-            protocol = TBinaryProtocol.TBinaryProtocol(self.transport)
-            self.client = CoordinatorClient(protocol)
-            self.transport.open()
+            self.client, self.transport = self._create_db_client()
             logger.info(f"向量库客户端连接成功：{self.coord_addr}")
         except Exception as e:
             logger.error(f"向量库连接失败：{e}")
@@ -46,34 +57,53 @@ class VectorDBOperation:
             self.transport.close()
             logger.info("向量库客户端连接已关闭")
 
-    def put_image(self, image_path: str) -> bool:
+    @staticmethod
+    def _image_key(image_path: str) -> str:
+        """图片KEY：不含扩展名的文件名"""
+        return image_path.split("/")[-1].split(".")[0]
+
+    @staticmethod
+    def _load_imported_keys() -> set:
+        """加载已成功入库的KEY（每行一个）"""
+        if not os.path.exists(IMPORTED_KEYS_PATH):
+            return set()
+        with open(IMPORTED_KEYS_PATH, "r", encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def _build_image_data(self, image_path: str, vec) -> VectorData:
         """
-        单张图片入库：KEY=文件名，metadata=文件路径
+        构造图片入库数据：KEY=文件名，metadata=文件路径
         :param image_path: 图片路径
-        :return: 成功返回True，失败返回False
+        :param vec: 图片向量（列表，或已按VECTOR_WIRE_DTYPE编码的字节串）
+        :return: VectorData
         """
-        # 1. 生成图片向量
-        vec = self.clip.image2vec(image_path)
-        if vec is None:
-            return False
-
-        # 2. 构造入库数据
-        file_name = image_path.split("/")[-1].split(".")[0]
+        if not isinstance(vec, bytes):
+            vec = pack_vector(vec, VECTOR_WIRE_DTYPE)
+        file_name = self._image_key(image_path)
         metadata = {
             "type":"image",
             "dataset":"unsplash-25K",
             "file_path": image_path,
-            "dimension": str(len(vec))
+            "dimension": str(len(vec) // np.dtype(VECTOR_WIRE_DTYPE).itemsize)
         }
 
         vector_data = VectorData(
             key=file_name,
-            vector=vec,
-            metadata=metadata
+            metadata=metadata,
+            packed_vector=vec,
+            packed_dtype=VECTOR_WIRE_DTYPE
         )
-        # 3. 调用PUT接口
-   
-        resp: Response = self.client.put(vector_data)
+        return vector_data
+
+    @staticmethod
+    def _put_data(client, vector_data: VectorData) -> bool:
+        """通过指定连接调用PUT接口"""
+        file_name = vector_data.key
+        try:
+            resp: Response = client.put(vector_data)
+        except Exception as e:
+            logger.error(f"图片[{file_name}]入库失败：{e}")
+            return False
         if resp.success:
             logger.info(f"图片[{file_name}]入库成功")
             return True
@@ -83,7 +113,35 @@ class VectorDBOperation:
             if "exceeds the specified limit" in resp.message:
                 logger.warning("HNSW索引容量不足，请修改datanode/handler.py增大max_elements并重启数据节点")
             return False
-        
+
+    @staticmethod
+    def _put_batch_data(client, data_list: list) -> bool:
+        """通过指定连接调用PUT_BATCH接口（一次RPC写入一批）"""
+        try:
+            resp: Response = client.put_batch(data_list)
+        except Exception as e:
+            logger.error(f"批量入库失败（{len(data_list)}张）：{e}")
+            return False
+        if resp.success:
+            logger.info(f"批量入库成功：{len(data_list)}张")
+            return True
+        else:
+            logger.error(f"批量入库失败（{len(data_list)}张）：{resp.message}")
+            if "exceeds the specified limit" in resp.message:
+                logger.warning("HNSW索引容量不足，请修改datanode/handler.py增大max_elements并重启数据节点")
+            return False
+
+    def put_image(self, image_path: str) -> bool:
+        """
+        单张图片入库
+        :param image_path: 图片路径
+        :return: 成功返回True，失败返回False
+        """
+        vec = self.clip.image2vec(image_path)
+        if vec is None:
+            return False
+        return self._put_data(self.client, self._build_image_data(image_path, vec))
+
     def batch_put_images(self, image_dir: str) -> tuple:
         """
         批量图片入库
@@ -94,27 +152,66 @@ class VectorDBOperation:
             logger.error(f"文件夹不存在：{image_dir}")
             return (0, 0, 0)
 
-        # 遍历所有图片
+        # 遍历所有图片（跳过已入库的KEY，支持断点续传）
+        imported = self._load_imported_keys()
         image_paths = []
-        flag=True
-        for file in os.listdir(image_dir):
-            if flag:
-                ext = os.path.splitext(file)[-1].lower()
-                if ext in SUPPORTED_IMAGE_EXT:
-                    image_paths.append(os.path.join(image_dir, file))
-            if not flag and file.endswith('FFo23lzk2YA.jpg'):
-                flag=True
+        skipped = 0
+        with os.scandir(image_dir) as it:
+            for entry in it:
+                if not entry.is_file() or not entry.name.lower().endswith(IMAGE_EXT_TUPLE):
+                    continue
+                if self._image_key(entry.path) in imported:
+                    skipped += 1
+                    continue
+                image_paths.append(entry.path)
+        if skipped:
+            logger.info(f"跳过已入库图片{skipped}张")
 
         if not image_paths:
-            logger.warning(f"文件夹[{image_dir}]下无有效图片")
+            logger.warning(f"文件夹[{image_dir}]下无待入库图片")
             return (0, 0, 0)
 
-        # 批量入库
-        success_count = 0
+        # 批量入库：当前线程负责编码（GPU），写入线程并发调用PUT_BATCH（网络），两者重叠
         total = len(image_paths)
-        for img_path in image_paths:
-            if self.put_image(img_path):
-                success_count += 1
+        success_count = 0
+        count_lock = threading.Lock()
+        data_queue = queue.Queue(maxsize=PUT_QUEUE_SIZE)
+        writer_conns = [self._create_db_client() for _ in range(PUT_WRITER_COUNT)]
+        os.makedirs(os.path.dirname(IMPORTED_KEYS_PATH), exist_ok=True)
+
+        with open(IMPORTED_KEYS_PATH, "a", encoding="utf-8") as ckpt:
+            def _writer(client):
+                nonlocal success_count
+                while True:
+                    data_list = data_queue.get()
+                    if data_list is None:
+                        break
+                    if self._put_batch_data(client, data_list):
+                        # 成功后立即记录KEY（整批失败则下次重新导入，PUT覆盖写是幂等的）
+                        with count_lock:
+                            success_count += len(data_list)
+                            ckpt.write("".join(d.key + "\n" for d in data_list))
+                            ckpt.flush()
+
+            writers = [
+                threading.Thread(target=_writer, args=(client,), daemon=True)
+                for client, _ in writer_conns
+            ]
+            for t in writers:
+                t.start()
+            try:
+                # 按批编码：子进程预取+预处理与前向重叠，一次前向处理MAX_BATCH张，整批一次RPC写入
+                for batch in self.clip.iter_images2vec(image_paths, packed_dtype=VECTOR_WIRE_DTYPE):
+                    data_list = [self._build_image_data(img_path, vec) for img_path, vec in batch]
+                    if data_list:
+                        data_queue.put(data_list)
+            finally:
+                for _ in writers:
+                    data_queue.put(None)
+                for t in writers:
+                    t.join()
+                for _, transport in writer_conns:
+                    transport.close()
 
         fail_count = total - success_count
         logger.info(f"入库完成：总数={total}，成功={success_count}，失败={fail_count}")
@@ -135,7 +232,8 @@ class VectorDBOperation:
         # 2. 构造检索请求
         search_req = SearchRequest(
             query_vector=vec,
-            top_k=top_k
+            top_k=top_k,
+            include_vectors=False  # 只用到元数据中的图片路径，不拉取向量
         )
 
         # 3. 调用SEARCH接口
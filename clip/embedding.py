@@ -1,96 +1,481 @@
+import io
 import os
+import contextlib
 import sys
+import threading
+import time
+
+# CUDA缓存分配器配置：必须在import torch之前设置才会作用于初始CUDA上下文。
+# 用可扩展段减少碎片；不要在批处理循环里调用torch.cuda.empty_cache()，
+# 它会遍历全部缓存块并拖慢稳态吞吐，且并不能把显存还给本进程。
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:512")
+# TorchInductor编译缓存落盘，服务重启后直接复用编译产物，跳过重新编译
+os.environ.setdefault(
+    "TORCHINDUCTOR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Static/torch_inductor_cache")
+)
+os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+import numpy as np
 import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset, DataLoader
 from loguru import logger
 from PIL import Image
-from transformers import CLIPProcessor, CLIPModel
+from transformers import CLIPProcessor, CLIPModel, CLIPTokenizerFast
 
 # 添加项目根目录到sys.path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 print(PROJECT_ROOT)
 
+# 项目内部导入
+from clip import _cache
+from src.utils.vector_utils import pack_vector, unpack_vector, INT8_SCALE
+
 # 全局配置
 CLIP_MODEL_PATH = os.path.join(PROJECT_ROOT, "Model/clip-vit-base-patch32")
-DEVICE = "cpu"
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 SUPPORTED_IMAGE_EXT = [".jpg", ".jpeg", ".png", ".bmp", ".gif"]
+MAX_BATCH = 64  # 单次前向的最大批量（锁页内存缓冲区行数）
+# GPU半精度类型：Ampere及以上用BF16（与FP32同指数范围，不会溢出），否则FP16
+HALF_DTYPE = torch.bfloat16 if DEVICE == "cuda" and torch.cuda.is_bf16_supported() else torch.float16
+COMPILE_MODEL = DEVICE == "cuda"  # 是否用torch.compile编译编码器（CPU下编译收益小、首次耗时长）
+WARMUP_BATCH_SIZES = (1, MAX_BATCH)  # 预热的批量大小，提前生成对应的编译缓存
+FAST_JPEG_DECODE = True  # JPEG按目标尺寸降采样解码（DCT域缩放，大图解码快数倍）
+USE_EMBED_CACHE = True  # 是否启用磁盘嵌入缓存（相同内容直接返回缓存向量，跳过前向）
+CACHE_NAMESPACE = os.path.basename(CLIP_MODEL_PATH)  # 缓存命名空间：换模型后旧缓存自动失效
+LOADER_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # 批量入库时图片读取/预处理的子进程数
+LOADER_PREFETCH = 4  # 每个子进程预取的批次数
+# 子进程启动方式：spawn启动全新解释器。fork会复制已初始化的CUDA上下文和运行中的写入线程持有的锁，子进程可能死锁或CUDA初始化失败
+LOADER_MP_CONTEXT = "spawn"
+
+def load_image(image_path: str, draft_size: int = None) -> Image.Image:
+    """
+    校验并读取图片，失败返回None
+    :param image_path: 图片路径
+    :param draft_size: JPEG降采样解码的目标短边（None表示完整解码）
+    """
+    if not os.path.exists(image_path):
+        logger.error(f"图片不存在：{image_path}")
+        return None
+
+    ext = os.path.splitext(image_path)[-1].lower()
+    if ext not in SUPPORTED_IMAGE_EXT:
+        logger.error(f"不支持的图片格式：{ext}（支持：{SUPPORTED_IMAGE_EXT}）")
+        return None
+
+    try:
+        image = Image.open(image_path)
+        if draft_size:
+            # 仅对JPEG生效，保证解码后短边仍不小于缩放目标
+            image.draft("RGB", (draft_size, draft_size))
+        return image.convert("RGB")
+    except Exception as e:
+        logger.error(f"图片[{image_path}]读取失败：{e}")
+        return None
+
+def resize_crop(image: Image.Image, resize_size: int, crop_size: int) -> np.ndarray:
+    """CPU阶段预处理：短边双三次缩放到resize_size + 中心裁剪，返回(crop, crop, 3)的uint8数组"""
+    w, h = image.size
+    short, long = (w, h) if w <= h else (h, w)
+    if short != resize_size:
+        new_long = int(resize_size * long / short)
+        new_size = (resize_size, new_long) if w <= h else (new_long, resize_size)
+        image = image.resize(new_size, Image.BICUBIC)
+        w, h = image.size
+    left, top = (w - crop_size) // 2, (h - crop_size) // 2
+    return np.asarray(image.crop((left, top, left + crop_size, top + crop_size)), dtype=np.uint8)
+
+class ImageDataset(Dataset):
+    """图片数据集（供DataLoader子进程并行读取/解码/缩放裁剪，并查询嵌入缓存）"""
+    def __init__(self, image_paths: list, resize_size: int, crop_size: int, use_cache: bool = USE_EMBED_CACHE):
+        self.image_paths = image_paths
+        self.resize_size = resize_size
+        self.crop_size = crop_size
+        self.use_cache = use_cache
+
+    def __len__(self):
+        return len(self.image_paths)
+
+    def __getitem__(self, idx: int) -> tuple:
+        """
+        :return: (下标, 缓存命中的向量或None, 缓存KEY或None, uint8像素数组或None)
+        """
+        image_path = self.image_paths[idx]
+        key = None
+        if self.use_cache:
+            try:
+                key = _cache.file_hash(image_path, CACHE_NAMESPACE)
+            except OSError:
+                key = None
+            if key is not None:
+                cached = _cache.get(key)
+                if cached is not None:
+                    return idx, cached.tolist(), key, None
+        image = load_image(image_path, self.resize_size if FAST_JPEG_DECODE else None)
+        if image is None:
+            return idx, None, key, None
+        return idx, None, key, resize_crop(image, self.resize_size, self.crop_size)
+
+def _collate_images(items: list) -> tuple:
+    """DataLoader合并函数：缓存命中的直接带回向量，其余图片堆叠为一个uint8批次（pin_memory时会被锁页）"""
+    hits = [(idx, vec) for idx, vec, _, _ in items if vec is not None]
+    misses = [(idx, key) for idx, vec, key, pixels in items if vec is None and pixels is not None]
+    pixels = None
+    if misses:
+        pixels = torch.from_numpy(np.stack([p for _, vec, _, p in items if vec is None and p is not None]))
+    return hits, misses, pixels
 
 class CLIPEmbedding:
-    """CLIP模型嵌入工具类（单例模式）"""
+    """CLIP模型嵌入工具类（单例模式，线程安全）"""
     _instance = None
+    _lock = threading.Lock()
 
     def __new__(cls):
+        # 双重检查：初始化完成后的调用不再加锁
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._init_model()
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
 
+    def __init__(self):
+        # __init__在每次构造时都会执行，模型只加载一次
+        if getattr(self, "_ready", False):
+            return
+        with self._lock:
+            if getattr(self, "_ready", False):
+                return
+            self._init_model()
+            self.warmup()
+            self._ready = True
+
     def _init_model(self):
         """初始化CLIP模型和处理器"""
         try:
             logger.info(f"加载CLIP模型：{CLIP_MODEL_PATH}（设备：{DEVICE}）")
-            self.model = CLIPModel.from_pretrained(CLIP_MODEL_PATH).to(DEVICE)
+            self.model = self._load_model().to(DEVICE).eval()
+            if DEVICE == "cuda":
+                # GPU下半精度权重：显存带宽减半，走Tensor Core；
+                # patch卷积权重转channels_last，与设备上由NHWC批次permute得到的输入布局一致，省去布局转换
+                self.model = self.model.to(dtype=HALF_DTYPE, memory_format=torch.channels_last)
             self.processor = CLIPProcessor.from_pretrained(CLIP_MODEL_PATH)
+            # Rust实现的快速分词器 + 预分配的定长输入缓冲区（避免每次查询重新分配/上传）
+            self.tokenizer = CLIPTokenizerFast.from_pretrained(CLIP_MODEL_PATH)
+            self.context_len = self.model.config.text_config.max_position_embeddings
+            self._ids_buf = torch.zeros((MAX_BATCH, self.context_len), dtype=torch.long, device=DEVICE)
+            self._mask_buf = torch.zeros((MAX_BATCH, self.context_len), dtype=torch.long, device=DEVICE)
+            self._text_lock = threading.Lock()
+            # GPU下预分配锁页内存缓冲区，D2H拷贝走异步通道，避免每次分配
+            self._host_buf = None
+            self._host_lock = threading.Lock()
+            if DEVICE == "cuda":
+                # 输入形状固定（224x224 / 77 token），让cuDNN自动选择最快算法
+                torch.backends.cudnn.benchmark = True
+                self._host_buf = torch.empty(
+                    (MAX_BATCH, self.model.config.projection_dim),
+                    dtype=torch.float32, pin_memory=True
+                )
+            # 图片预处理参数（与CLIPProcessor一致）：CPU只做缩放/裁剪得到uint8，
+            # 转浮点+归一化在设备上对整批一次完成（255已折算进均值/方差）
+            image_processor = self.processor.image_processor
+            self.resize_size = image_processor.size["shortest_edge"]
+            self.crop_size = image_processor.crop_size["height"]
+            self._pixel_mean = torch.tensor(image_processor.image_mean, device=DEVICE).view(1, 3, 1, 1) * 255.0
+            self._pixel_std = torch.tensor(image_processor.image_std, device=DEVICE).view(1, 3, 1, 1) * 255.0
+            self._pixel_dtype = HALF_DTYPE if DEVICE == "cuda" else torch.float32
+            # 编码入口：默认即模型方法，开启编译时替换为融合内核后的版本
+            self._encode_image_fn = self.model.get_image_features
+            self._encode_text_fn = self.model.get_text_features
+            # reduce-overhead模式以CUDA Graph重放，输出张量位于图的静态内存池，下一次重放即被覆盖：
+            # 编译后的编码器（文本/图片共用）串行调用，并在锁内把输出复制出来（归一化产生新张量）
+            self._forward_lock = contextlib.nullcontext()
+            if COMPILE_MODEL:
+                self._encode_image_fn = torch.compile(self._encode_image_fn, mode="reduce-overhead", dynamic=True)
+                self._encode_text_fn = torch.compile(self._encode_text_fn, mode="reduce-overhead", dynamic=True)
+                self._forward_lock = threading.Lock()
             logger.info("CLIP模型加载成功")
         except Exception as e:
             logger.error(f"CLIP模型加载失败：{e}")
             raise e
 
-    def image2vec(self, image_path: str) -> list:
+    @staticmethod
+    def _load_model() -> CLIPModel:
+        """
+        加载CLIP模型，注意力层使用F.scaled_dot_product_attention（GPU下可走FlashAttention/显存高效内核，
+        不在显存中物化完整注意力矩阵）；旧版transformers不支持该参数时回退默认实现
+        """
+        if DEVICE == "cuda":
+            torch.backends.cuda.enable_flash_sdp(True)
+            torch.backends.cuda.enable_mem_efficient_sdp(True)
+        try:
+            return CLIPModel.from_pretrained(CLIP_MODEL_PATH, attn_implementation="sdpa")
+        except (TypeError, ValueError, ImportError) as e:
+            logger.warning(f"当前transformers不支持SDPA注意力，回退默认实现：{e}")
+            return CLIPModel.from_pretrained(CLIP_MODEL_PATH)
+
+    def warmup(self):
+        """
+        预热：按常用批量大小各跑一次前向，提前完成CUDA上下文、cuDNN算法选择、
+        显存分配和模型编译，避免首个真实请求承担这部分耗时；
+        CPU下没有这些一次性开销，只跑单条前向
+        """
+        start = time.time()
+        for n in (WARMUP_BATCH_SIZES if DEVICE == "cuda" else (1,)):
+            self._encode_texts(["warmup"] * n)
+            self._encode_images([Image.new("RGB", (224, 224))] * n)
+        if DEVICE == "cuda":
+            torch.cuda.synchronize()
+        logger.info(f"CLIP模型预热完成，耗时{time.time() - start:.2f}s")
+
+    @staticmethod
+    def _autocast():
+        """GPU下以半精度（HALF_DTYPE）自动混合精度执行前向，CPU下不生效"""
+        return torch.autocast(device_type=DEVICE, dtype=HALF_DTYPE, enabled=DEVICE == "cuda")
+
+    def _to_list(self, vec: torch.Tensor) -> list:
+        """
+        向量拷回主机并转为列表（numpy的tolist为C循环，快于tensor.tolist）
+        :param vec: (n, dim)的嵌入张量
+        :return: n个向量组成的列表
+        """
+        if vec.device.type != "cuda":
+            return vec.numpy().tolist()
+        n = vec.shape[0]
+        with self._host_lock:
+            host = self._host_buf[:n]
+            host.copy_(vec, non_blocking=True)
+            torch.cuda.current_stream().synchronize()
+            return host.numpy().tolist()
+
+    def _to_packed(self, vec: torch.Tensor, dtype: str) -> list:
+        """
+        在设备上量化后再拷回主机（int8仅为float32拷贝量的1/4），编码与pack_vector一致
+        :param vec: (n, dim)的归一化嵌入张量
+        :param dtype: 向量编码（float32/float16/int8）
+        :return: n个向量的字节串列表
+        """
+        if dtype == "float32":
+            q = vec.float()
+        elif dtype == "int8":
+            q = (vec * INT8_SCALE).round_().clamp_(-127, 127).to(torch.int8)
+        elif dtype == "float16":
+            q = vec.to(torch.float16)
+        else:
+            raise ValueError(f"不支持的向量编码：{dtype}")
+        return [row.tobytes() for row in q.cpu().numpy()]
+
+    def _load_image(self, image_path: str) -> Image.Image:
+        """校验并读取图片，失败返回None"""
+        return load_image(image_path, self.resize_size if FAST_JPEG_DECODE else None)
+
+    @staticmethod
+    def _image_cache_key(image_path: str) -> str:
+        """图片文件的缓存KEY，文件不可读时返回None（交由后续读取流程报错）"""
+        try:
+            return _cache.file_hash(image_path, CACHE_NAMESPACE)
+        except OSError:
+            return None
+
+    def image2vec(self, image_path: str, use_cache: bool = USE_EMBED_CACHE) -> list:
         """
         图片转512维向量（归一化）
         :param image_path: 图片路径
+        :param use_cache: 是否使用磁盘嵌入缓存
         :return: 512维向量列表，失败返回None
         """
-        if not os.path.exists(image_path):
-            logger.error(f"图片不存在：{image_path}")
-            return None
-        
-        ext = os.path.splitext(image_path)[-1].lower()
-        if ext not in SUPPORTED_IMAGE_EXT:
-            logger.error(f"不支持的图片格式：{ext}（支持：{SUPPORTED_IMAGE_EXT}）")
-            return None
+        return self.images2vec([image_path], use_cache=use_cache)[0]
 
+    def images2vec(self, image_paths: list, use_cache: bool = USE_EMBED_CACHE) -> list:
+        """
+        批量图片转向量（按MAX_BATCH分块，每块一次前向，提升GPU利用率）
+        :param image_paths: 图片路径列表
+        :param use_cache: 是否使用磁盘嵌入缓存（命中的图片不参与前向）
+        :return: 与输入一一对应的向量列表，失败的位置为None
+        """
+        results = [None] * len(image_paths)
+        for start in range(0, len(image_paths), MAX_BATCH):
+            indices, images, keys = [], [], []
+            for i in range(start, min(start + MAX_BATCH, len(image_paths))):
+                key = self._image_cache_key(image_paths[i]) if use_cache else None
+                if key is not None:
+                    cached = _cache.get(key)
+                    if cached is not None:
+                        results[i] = cached.tolist()
+                        continue
+                image = self._load_image(image_paths[i])
+                if image is not None:
+                    indices.append(i)
+                    images.append(image)
+                    keys.append(key)
+            if not images:
+                continue
+            try:
+                vecs = self._encode_images(images)
+            except Exception as e:
+                logger.error(f"批量图片嵌入失败（第{start}~{start + len(images)}张）：{e}")
+                continue
+            for i, key, vec in zip(indices, keys, vecs):
+                results[i] = vec
+                if key is not None:
+                    _cache.put(key, vec)
+        return results
+
+    def iter_images2vec(self, image_paths: list, use_cache: bool = USE_EMBED_CACHE,
+                        num_workers: int = LOADER_WORKERS, packed_dtype: str = None):
+        """
+        流水线批量图片转向量：DataLoader子进程预取（读取/解码/缩放裁剪/查缓存），
+        与设备上的前向重叠执行，适合大批量入库
+        :param image_paths: 图片路径列表
+        :param use_cache: 是否使用磁盘嵌入缓存
+        :param num_workers: 预处理子进程数（0表示在当前进程中处理）
+        :param packed_dtype: 指定时在设备上量化，产出pack_vector格式的字节串而非列表
+        :return: 生成器，每批产出[(图片路径, 向量)]，失败的图片不产出
+        """
+        loader = DataLoader(
+            ImageDataset(image_paths, self.resize_size, self.crop_size, use_cache),
+            batch_size=MAX_BATCH,
+            num_workers=num_workers,
+            pin_memory=DEVICE == "cuda",
+            prefetch_factor=LOADER_PREFETCH if num_workers > 0 else None,
+            multiprocessing_context=LOADER_MP_CONTEXT if num_workers > 0 else None,
+            persistent_workers=False,
+            collate_fn=_collate_images
+        )
+        for hits, misses, pixels in loader:
+            if packed_dtype:
+                results = [(image_paths[idx], pack_vector(vec, packed_dtype)) for idx, vec in hits]
+            else:
+                results = [(image_paths[idx], vec) for idx, vec in hits]
+            if misses:
+                try:
+                    if packed_dtype:
+                        vecs = self._to_packed(self._forward_pixels(pixels), packed_dtype)
+                    else:
+                        vecs = self._to_list(self._forward_pixels(pixels))
+                except Exception as e:
+                    logger.error(f"批量图片嵌入失败（{len(misses)}张）：{e}")
+                    vecs = []
+                for (idx, key), vec in zip(misses, vecs):
+                    results.append((image_paths[idx], vec))
+                    if key is not None:
+                        # 量化产出时缓存解码后的向量，与入库后的精度一致
+                        _cache.put(key, unpack_vector(vec, packed_dtype) if packed_dtype else vec)
+            yield results
+
+    def image_stream2vec(self, stream, use_cache: bool = USE_EMBED_CACHE) -> list:
+        """
+        图片字节流转512维向量（直接在内存中解码，无需先落盘）
+        :param stream: 文件对象（如上传文件流）或bytes
+        :param use_cache: 是否使用磁盘嵌入缓存
+        :return: 512维向量列表，失败返回None
+        """
         try:
-            # 读取并预处理图片
-            image = Image.open(image_path).convert("RGB")
-            inputs = self.processor(images=image, return_tensors="pt").to(DEVICE)
-            
-            # 生成嵌入向量
-            with torch.no_grad():
-                vec = self.model.get_image_features(**inputs)
-            
-            # 归一化（必须，保证检索精度）
-            vec = vec / vec.norm(dim=-1, keepdim=True)
-            return vec.squeeze().cpu().numpy().tolist()
+            data = stream if isinstance(stream, (bytes, bytearray)) else stream.read()
+            key = _cache.bytes_hash(data, CACHE_NAMESPACE) if use_cache else None
+            if key is not None:
+                cached = _cache.get(key)
+                if cached is not None:
+                    return cached.tolist()
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+            vec = self._encode_images([image])[0]
+            if key is not None:
+                _cache.put(key, vec)
+            return vec
         except Exception as e:
-            logger.error(f"图片[{image_path}]嵌入失败：{e}")
+            logger.error(f"图片流嵌入失败：{e}")
             return None
 
-    def text2vec(self, text: str) -> list:
+    def _encode_images(self, images: list) -> list:
+        """已解码图片（不超过MAX_BATCH张）→ 归一化向量，一次批量前向"""
+        batch = torch.from_numpy(np.stack([resize_crop(image, self.resize_size, self.crop_size) for image in images]))
+        if DEVICE == "cuda":
+            batch = batch.pin_memory()
+        return self._encode_pixels(batch)
+
+    def _encode_pixels(self, batch: torch.Tensor) -> list:
+        """(B, crop, crop, 3)的uint8批次 → 归一化向量列表"""
+        return self._to_list(self._forward_pixels(batch))
+
+    def _forward_pixels(self, batch: torch.Tensor) -> torch.Tensor:
+        """(B, crop, crop, 3)的uint8批次 → 设备上的归一化向量：整批拷到设备，再转浮点并归一化后前向"""
+        batch = batch.to(DEVICE, non_blocking=True).permute(0, 3, 1, 2).float()
+        pixel_values = ((batch - self._pixel_mean) / self._pixel_std).to(self._pixel_dtype)
+
+        # 生成嵌入向量
+        with self._forward_lock, self._autocast(), torch.inference_mode():
+            vec = self._encode_image_fn(pixel_values=pixel_values)
+            # 归一化（必须，保证检索精度）；转回FP32再归一化，与投影同处一个上下文，便于内核融合
+            vec = F.normalize(vec.float(), p=2, dim=-1, eps=1e-12)
+        return vec
+
+    def text2vec(self, text: str, use_cache: bool = USE_EMBED_CACHE) -> list:
         """
         文本转512维向量（归一化）
         :param text: 输入文本
+        :param use_cache: 是否使用磁盘嵌入缓存
         :return: 512维向量列表，失败返回None
         """
         if not text or text.strip() == "":
             logger.error("空文本无法嵌入")
             return None
+        return self.texts2vec([text], use_cache=use_cache)[0]
 
-        try:
-            # 预处理文本
-            inputs = self.processor(text=text, return_tensors="pt").to(DEVICE)
-            
-            # 生成嵌入向量
-            with torch.no_grad():
-                vec = self.model.get_text_features(**inputs)
-            
-            # 归一化
-            vec = vec / vec.norm(dim=-1, keepdim=True)
-            return vec.squeeze().cpu().numpy().tolist()
-        except Exception as e:
-            logger.error(f"文本[{text}]嵌入失败：{e}")
-            return None
+    def texts2vec(self, texts: list, use_cache: bool = USE_EMBED_CACHE) -> list:
+        """
+        批量文本转向量（按MAX_BATCH分块，每块一次前向）
+        :param texts: 文本列表
+        :param use_cache: 是否使用磁盘嵌入缓存（命中的文本不参与前向）
+        :return: 与输入一一对应的向量列表，空文本或失败的位置为None
+        """
+        results = [None] * len(texts)
+        for start in range(0, len(texts), MAX_BATCH):
+            indices, keys = [], []
+            for i in range(start, min(start + MAX_BATCH, len(texts))):
+                if not texts[i] or not texts[i].strip():
+                    continue
+                key = _cache.text_hash(texts[i], CACHE_NAMESPACE) if use_cache else None
+                if key is not None:
+                    cached = _cache.get(key)
+                    if cached is not None:
+                        results[i] = cached.tolist()
+                        continue
+                indices.append(i)
+                keys.append(key)
+            if not indices:
+                continue
+            try:
+                vecs = self._encode_texts([texts[i] for i in indices])
+            except Exception as e:
+                logger.error(f"批量文本嵌入失败（第{start}~{start + len(indices)}条）：{e}")
+                continue
+            for i, key, vec in zip(indices, keys, vecs):
+                results[i] = vec
+                if key is not None:
+                    _cache.put(key, vec)
+        return results
+
+    def _encode_texts(self, texts: list) -> list:
+        """文本（不超过MAX_BATCH条）→ 归一化向量，一次批量前向"""
+        # 预处理文本（定长填充，超长截断）
+        enc = self.tokenizer(
+            texts, padding="max_length", max_length=self.context_len,
+            truncation=True, return_tensors="np"
+        )
+        n = enc["input_ids"].shape[0]
+
+        # 填入共享输入缓冲区并生成嵌入向量
+        with self._text_lock:
+            input_ids = self._ids_buf[:n]
+            attention_mask = self._mask_buf[:n]
+            input_ids.copy_(torch.from_numpy(enc["input_ids"]), non_blocking=True)
+            attention_mask.copy_(torch.from_numpy(enc["attention_mask"]), non_blocking=True)
+            with self._forward_lock, self._autocast(), torch.inference_mode():
+                vec = self._encode_text_fn(input_ids=input_ids, attention_mask=attention_mask)
+                # 归一化（FP32）
+                vec = F.normalize(vec.float(), p=2, dim=-1, eps=1e-12)
+            return self._to_list(vec)
 
 # ========== 嵌入测试主函数 ==========
 def main():
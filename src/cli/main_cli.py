@@ -5,8 +5,7 @@ from Config import COORDINATOR_DEFAULT_PORT
 # Thrift导入
 from src.vector_db import CoordinatorService
 from src.vector_db.ttypes import SearchRequest
-from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
+from src.utils.rpc_utils import create_rpc_client
 
 # 初始化彩色输出
 init(autoreset=True)
@@ -17,15 +16,30 @@ init(autoreset=True)
 def cli(ctx, coord_addr):
     """分布式向量数据库CLI工具"""
     ctx.ensure_object(dict)
-    # 初始化协调节点客户端
-    host, port = coord_addr.split(":")
-    transport = TSocket.TSocket(host, int(port))
-    transport = TTransport.TBufferedTransport(transport)
-    protocol = TBinaryProtocol.TBinaryProtocol(transport)
-    ctx.obj["client"] = CoordinatorService.Client(protocol)
-    ctx.obj["transport"] = transport
+    # 连接在子命令首次使用时才建立：--help与参数解析错误不需要协调节点在线
     ctx.obj["coord_addr"] = coord_addr
 
+def get_client(ctx) -> CoordinatorService.Client:
+    """
+    获取协调节点客户端：整个命令调用期间只建立一次连接，命令结束时关闭
+    :param ctx: click上下文
+    :return: CoordinatorService.Client（连接失败时输出错误并退出）
+    """
+    root = ctx.find_root()
+    client = root.obj.get("client")
+    if client is None:
+        coord_addr = root.obj["coord_addr"]
+        client, transport = create_rpc_client(CoordinatorService.Client, coord_addr)
+        try:
+            transport.open()
+        except Exception as e:
+            click.echo(Fore.RED + f"❌ 无法连接协调节点{coord_addr}：{str(e)}")
+            ctx.exit(1)
+        root.call_on_close(transport.close)
+        root.obj["client"] = client
+        root.obj["transport"] = transport
+    return client
+
 # 节点管理命令
 @cli.command()
 @click.option("--node-id", required=True, help="节点ID")
@@ -33,30 +47,23 @@ def cli(ctx, coord_addr):
 @click.pass_context
 def register_node(ctx, node_id, node_addr):
     """注册数据节点"""
-    client = ctx.obj["client"]
-    transport = ctx.obj["transport"]
+    client = get_client(ctx)
     try:
-        transport.open()
         resp = client.register_node(node_id, node_addr)
-        transport.close()
         if resp.success:
             click.echo(Fore.GREEN + f"✅ {resp.message}")
         else:
             click.echo(Fore.RED + f"❌ {resp.message}")
     except Exception as e:
-        transport.close()
         click.echo(Fore.RED + f"❌ 注册失败：{str(e)}")
 
 @cli.command()
 @click.pass_context
 def list_nodes(ctx):
     """列出所有数据节点"""
-    client = ctx.obj["client"]
-    transport = ctx.obj["transport"]
+    client = get_client(ctx)
     try:
-        transport.open()
         resp = client.list_nodes()
-        transport.close()
         if resp.success:
             click.echo(Fore.BLUE + "\n📌 数据节点列表：")
             from prettytable import PrettyTable
@@ -68,7 +75,6 @@ def list_nodes(ctx):
         else:
             click.echo(Fore.RED + f"❌ {resp.message}")
     except Exception as e:
-        transport.close()
         click.echo(Fore.RED + f"❌ 获取节点失败：{str(e)}")
 
 # 向量操作命令
@@ -105,18 +111,14 @@ def put(ctx, key, vector, metadata):
     )
 
     # 发送请求
-    client = ctx.obj["client"]
-    transport = ctx.obj["transport"]
+    client = get_client(ctx)
     try:
-        transport.open()
         resp = client.put(data)
-        transport.close()
         if resp.success:
             click.echo(Fore.GREEN + f"✅ 写入成功！Key={key}")
         else:
             click.echo(Fore.RED + f"❌ {resp.message}")
     except Exception as e:
-        transport.close()
         click.echo(Fore.RED + f"❌ 网络错误：{str(e)}")
 
 @cli.command()
@@ -124,18 +126,14 @@ def put(ctx, key, vector, metadata):
 @click.pass_context
 def delete(ctx, key):
     """删除向量"""
-    client = ctx.obj["client"]
-    transport = ctx.obj["transport"]
+    client = get_client(ctx)
     try:
-        transport.open()
         resp = client.delete(key)
-        transport.close()
         if resp.success:
             click.echo(Fore.GREEN + f"✅ 删除成功！Key={key}")
         else:
             click.echo(Fore.RED + f"❌ {resp.message}")
     except Exception as e:
-        transport.close()
         click.echo(Fore.RED + f"❌ 网络错误：{str(e)}")
 
 @cli.command()
@@ -143,12 +141,9 @@ def delete(ctx, key):
 @click.pass_context
 def get(ctx, key):
     """获取向量"""
-    client = ctx.obj["client"]
-    transport = ctx.obj["transport"]
+    client = get_client(ctx)
     try:
-        transport.open()
         resp = client.get(key)
-        transport.close()
         if resp.success:
             data = resp.vector_data
             click.echo(Fore.GREEN + f"✅ 获取成功！")
@@ -159,7 +154,6 @@ def get(ctx, key):
         else:
             click.echo(Fore.RED + f"❌ {resp.message}")
     except Exception as e:
-        transport.close()
         click.echo(Fore.RED + f"❌ 网络错误：{str(e)}")
 
 @cli.command()
@@ -192,16 +186,14 @@ def search(ctx, query_vec, top_k, filter, threshold):
         query_vector=query_list,
         top_k=top_k,
         filter=filter_dict,
-        threshold=threshold
+        threshold=threshold,
+        include_vectors=False  # 结果表只展示key/分数/元数据
     )
 
     # 发送请求
-    client = ctx.obj["client"]
-    transport = ctx.obj["transport"]
+    client = get_client(ctx)
     try:
-        transport.open()
         resp = client.search(req)
-        transport.close()
         if resp.success:
             res = resp.search_result
             click.echo(Fore.GREEN + f"✅ 检索成功！共{len(res.keys)}条结果")
@@ -214,7 +206,6 @@ def search(ctx, query_vec, top_k, filter, threshold):
         else:
             click.echo(Fore.RED + f"❌ {resp.message}")
     except Exception as e:
-        transport.close()
         click.echo(Fore.RED + f"❌ 网络错误：{str(e)}")
 
 if __name__ == "__main__":
@@ -1,67 +1,191 @@
 import sys
+import time
+import heapq
+import queue
 import signal
 import threading
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from operator import itemgetter
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 from loguru import logger
 from typing import Dict, Tuple
 from Config import (
-    SHARD_COUNT, REPLICA_COUNT, RPC_TIMEOUT,
-    RPC_POOL_SIZE, RPC_POOL_IDLE_TIMEOUT
+    VECTOR_DIM, SHARD_COUNT, REPLICA_COUNT, RPC_TIMEOUT,
+    RPC_POOL_SIZE, RPC_POOL_IDLE_TIMEOUT, RPC_POOL_MIN_SIZE,
+    SEARCH_FANOUT_WORKERS, SEARCH_OVERFETCH_MAX, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
 )
 from src.utils import (
-    get_zk_manager, get_shard_id, assign_shards_to_nodes
+    get_zk_manager, get_shard_id, assign_shards_to_nodes, create_rpc_client,
+    is_connection_alive, ShardBatcher, unpack_vector, data_to_vector, DEFAULT_PACKED_DTYPE
 )
 # Thrift导入
 from src.vector_db import CoordinatorService, VectorNodeService
 from src.vector_db.ttypes import (
     VectorData, SearchRequest, Response, SearchResult
 )
-from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
+from thrift.transport import TTransport
 from src.vector_db.CoordinatorService import Iface
 
+# 广播/拉取向量等待所有节点的总超时（s）：单个RPC超时的两倍
+FANOUT_TIMEOUT = RPC_TIMEOUT * 2 / 1000
+
 # ---------------- RPC连接池 ----------------
 class RPCClientPool:
-    """RPC连接池：管理数据节点的RPC连接复用"""
+    """
+    RPC连接池：每个数据节点一个LIFO空闲队列 + 信号量限制最大连接数
+    （LIFO优先复用最近用过的热连接，冷连接自然老化后由清理线程关闭）
+    """
     def __init__(self):
-        self.pool: Dict[str, list] = {}  # node_id -> [(client, transport), ...]
-        self.lock = threading.Lock()
+        self.pool: Dict[str, queue.LifoQueue] = {}  # node_id -> 空闲连接队列[(client, transport, 归还时间)]
+        self.sem: Dict[str, threading.Semaphore] = {}  # node_id -> 连接数配额（空闲+借出 ≤ max_size）
+        self.lock = threading.Lock()  # 仅保护上面两个字典的创建，不在锁内建连接
         self.idle_timeout = RPC_POOL_IDLE_TIMEOUT
         self.max_size = RPC_POOL_SIZE
+        self._sweeper = threading.Thread(target=self._sweep_loop, daemon=True, name="rpc-pool-sweeper")
+        self._sweeper.start()
 
-    def get_client(self, node_id: str) -> Tuple[VectorNodeService.Client, TTransport.TBufferedTransport]:
+    def _node_slot(self, node_id: str) -> Tuple[queue.LifoQueue, threading.Semaphore]:
         with self.lock:
-            zk_manager = get_zk_manager()
-            nodes = zk_manager.get_all_nodes()
-            if node_id not in nodes:
+            if node_id not in self.pool:
+                self.pool[node_id] = queue.LifoQueue()
+                self.sem[node_id] = threading.Semaphore(self.max_size)
+            return self.pool[node_id], self.sem[node_id]
+
+    @staticmethod
+    def _create_client(address: str) -> Tuple[VectorNodeService.Client, TTransport.TFramedTransport]:
+        client, transport = create_rpc_client(VectorNodeService.Client, address, RPC_TIMEOUT)
+        transport.open()
+        return client, transport
+
+    def get_client(self, node_id: str, address: str = None) -> Tuple[VectorNodeService.Client, TTransport.TFramedTransport]:
+        """
+        借出连接：优先复用空闲连接；未达上限则新建；否则等待归还（超时返回None）
+        :param address: 节点地址（调用方已持有节点列表快照时传入，避免重复查询）
+        """
+        if address is None:
+            address = get_zk_manager().get_all_nodes().get(node_id)
+            if address is None:
                 logger.error(f"节点{node_id}不存在")
                 return None, None
-            if node_id not in self.pool or not self.pool[node_id]:
-                host, port = nodes[node_id].split(":")
-                transport = TSocket.TSocket(host, int(port))
-                transport.setTimeout(RPC_TIMEOUT)
-                transport = TTransport.TBufferedTransport(transport)
-                protocol = TBinaryProtocol.TBinaryProtocol(transport)
-                client = VectorNodeService.Client(protocol)
-                transport.open()
-                self.pool[node_id] = [(client, transport)]
-            return self.pool[node_id].pop(0)
-
-    def release_client(self, node_id: str, client: VectorNodeService.Client, transport: TTransport.TBufferedTransport):
-        with self.lock:
-            if node_id not in self.pool:
-                self.pool[node_id] = []
-            if len(self.pool[node_id]) < self.max_size:
-                self.pool[node_id].append((client, transport))
-            else:
-                transport.close()
+        idle, sem = self._node_slot(node_id)
+
+        while True:
+            try:
+                client, transport, last_used = idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - last_used <= self.idle_timeout and is_connection_alive(transport):
+                return client, transport
+            # 空闲超时（清理线程尚未处理）或空闲期间对端已关闭（节点重启等），丢弃后继续取下一个
+            self.discard(node_id, transport)
+
+        if sem.acquire(blocking=False):
+            try:
+                return self._create_client(address)
+            except Exception as e:
+                sem.release()
+                logger.error(f"连接节点{node_id}失败：{e}")
+                return None, None
+
+        try:
+            client, transport, _ = idle.get(timeout=RPC_TIMEOUT / 1000)
+            return client, transport
+        except queue.Empty:
+            logger.error(f"节点{node_id}连接池已满（{self.max_size}），等待空闲连接超时")
+            return None, None
+
+    def release_client(self, node_id: str, client: VectorNodeService.Client, transport: TTransport.TFramedTransport):
+        """归还连接"""
+        idle, _ = self._node_slot(node_id)
+        idle.put_nowait((client, transport, time.monotonic()))
+
+    @contextmanager
+    def borrow(self, node_id: str, address: str = None):
+        """
+        借出连接的上下文管理器：正常退出时归还，异常时丢弃（连接状态未知），调用方无法泄漏连接
+        借不到连接时产出(None, None)
+        """
+        client, transport = self.get_client(node_id, address)
+        if not client:
+            yield None, None
+            return
+        try:
+            yield client, transport
+        except Exception:
+            self.discard(node_id, transport)
+            raise
+        self.release_client(node_id, client, transport)
+
+    def discard(self, node_id: str, transport: TTransport.TFramedTransport):
+        """丢弃连接（调用异常后状态未知），释放配额"""
+        _, sem = self._node_slot(node_id)
+        if transport.isOpen():
+            transport.close()
+        sem.release()
+
+    def prewarm(self, node_id: str, address: str, count: int = RPC_POOL_MIN_SIZE):
+        """
+        后台预建连接放入空闲队列（节点注册/协调节点启动时调用），首批请求不再承担TCP握手
+        :param count: 预热后空闲连接的目标数量
+        """
+        def _warm():
+            idle, sem = self._node_slot(node_id)
+            created = 0
+            while idle.qsize() < count and sem.acquire(blocking=False):
+                try:
+                    client, transport = self._create_client(address)
+                except Exception as e:
+                    sem.release()
+                    logger.warning(f"节点{node_id}连接预热失败：{e}")
+                    break
+                idle.put_nowait((client, transport, time.monotonic()))
+                created += 1
+            if created:
+                logger.info(f"节点{node_id}连接预热完成：新建{created}个连接")
+
+        threading.Thread(target=_warm, daemon=True, name=f"rpc-pool-prewarm-{node_id}").start()
+
+    def _sweep_loop(self):
+        """定期关闭空闲超过idle_timeout或已被对端关闭的连接"""
+        while True:
+            time.sleep(max(1, self.idle_timeout / 2))
+            with self.lock:
+                slots = [(node_id, self.pool[node_id]) for node_id in self.pool]
+            now = time.monotonic()
+            for node_id, idle in slots:
+                fresh = []
+                evicted = 0
+                while True:
+                    try:
+                        item = idle.get_nowait()
+                    except queue.Empty:
+                        break
+                    if now - item[2] > self.idle_timeout or not is_connection_alive(item[1]):
+                        self.discard(node_id, item[1])
+                        evicted += 1
+                    else:
+                        fresh.append(item)
+                # 按从旧到新放回，保持LIFO顺序
+                for item in reversed(fresh):
+                    idle.put_nowait(item)
+                if evicted:
+                    logger.debug(f"节点{node_id}关闭空闲连接{evicted}个，剩余{len(fresh)}个")
 
     def close_all(self):
         with self.lock:
-            for node_id in self.pool:
-                for _, transport in self.pool[node_id]:
+            for node_id, idle in self.pool.items():
+                while True:
+                    try:
+                        _, transport, _ = idle.get_nowait()
+                    except queue.Empty:
+                        break
                     if transport.isOpen():
                         transport.close()
             self.pool.clear()
+            self.sem.clear()
         logger.info("RPC连接池已清空")
 
 _rpc_pool = None
@@ -79,11 +203,24 @@ class CoordinatorHandler(Iface):
         self.shard_count = SHARD_COUNT
         self.replica_count = REPLICA_COUNT
         self.rpc_pool = get_rpc_client_pool()
+        # 广播检索线程池：各数据节点的RPC并发执行，总耗时≈最慢节点而非各节点之和
+        self.search_pool = ThreadPoolExecutor(max_workers=SEARCH_FANOUT_WORKERS, thread_name_prefix="search-fanout")
+        # 检索结果缓存：缓存键 -> (过期时间, Response)；写入版本号变化后旧结果不再命中
+        self.search_cache = OrderedDict()
+        self.search_cache_lock = threading.Lock()
+        self.write_version = 0
+        # 每个主节点一个单条写入合并器（按需创建）
+        self.put_batchers: Dict[str, ShardBatcher] = {}
+        self.put_batchers_lock = threading.Lock()
+        # 预热已在线节点的连接
+        for node_id, address in self.zk_manager.get_all_nodes().items():
+            self.rpc_pool.prewarm(node_id, address)
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
     def _signal_handler(self, signum, frame):
         logger.info(f"\n接收到退出信号 {signum}，清理协调节点资源...")
+        self.search_pool.shutdown(wait=False)
         self.rpc_pool.close_all()
         self.zk_manager.close()
         logger.info("协调节点资源清理完成，退出")
@@ -93,6 +230,7 @@ class CoordinatorHandler(Iface):
     def register_node(self, node_id: str, address: str) -> Response:
         try:
             self.zk_manager.register_node(node_id, address)
+            self.rpc_pool.prewarm(node_id, address)
             nodes = list(self.zk_manager.get_all_nodes().keys())
             shard_mapping = assign_shards_to_nodes(nodes, self.shard_count, self.replica_count)
             for shard_id, mapping in shard_mapping.items():
@@ -116,6 +254,10 @@ class CoordinatorHandler(Iface):
     # ---------------- 路由写入 ----------------
     def put(self, data: VectorData) -> Response:
         try:
+            # 维度不符的写入在合并前拒绝，不进入其它写入所在的批次
+            dim = data_to_vector(data).shape[0]
+            if dim != VECTOR_DIM:
+                return Response(success=False, message=f"向量维度错误：期望{VECTOR_DIM}，实际{dim}")
             shard_id = get_shard_id(data.key)
             shard_nodes = self.zk_manager.get_shard_nodes(shard_id)
             if not shard_nodes:
@@ -124,17 +266,98 @@ class CoordinatorHandler(Iface):
             online_nodes = self.zk_manager.get_all_nodes()
             if master_node not in online_nodes:
                 return Response(success=False, message=f"主节点{master_node}已离线")
-            client, transport = self.rpc_pool.get_client(master_node)
-            if not client:
-                self.zk_manager._remove_offline_node(master_node)
-                return Response(success=False, message=f"无法连接主节点{master_node}，已标记离线")
-            resp = client.put(data)
-            self.rpc_pool.release_client(master_node, client, transport)
-            return resp
+            # 交给该主节点的合并器，与并发的其它单条写入合并为一次put_batch
+            return self._get_put_batcher(master_node).submit(data).result(timeout=FANOUT_TIMEOUT)
         except Exception as e:
             logger.error(f"PUT路由失败：{e}")
             return Response(success=False, message=str(e))
 
+    def _get_put_batcher(self, node_id: str) -> ShardBatcher:
+        batcher = self.put_batchers.get(node_id)
+        if batcher is None:
+            with self.put_batchers_lock:
+                batcher = self.put_batchers.get(node_id)
+                if batcher is None:
+                    batcher = self.put_batchers[node_id] = ShardBatcher(node_id, self._send_put_batch)
+        return batcher
+
+    def _send_put_batch(self, node_id: str, data_list: list) -> Response:
+        """合并器的发送函数：一次put_batch写入主节点"""
+        try:
+            resp = self._call_node(node_id, None, "put_batch", data_list)
+        finally:
+            self._invalidate_search_cache()
+        if resp is None:
+            self.zk_manager._remove_offline_node(node_id)
+            return Response(success=False, message=f"无法连接主节点{node_id}，已标记离线")
+        return resp
+
+    def _route_batch(self, items: list, key_fn, method: str) -> Tuple[int, list]:
+        """
+        批量路由：按分片主节点分组，各主节点的批量RPC在线程池中并发执行
+        :param items: 待路由的数据列表
+        :param key_fn: 从数据项取key的函数
+        :param method: 数据节点的批量RPC方法名
+        :return: (涉及的主节点数, 错误信息列表)
+        """
+        # 1. 按主节点分组（同一分片只查一次ZK）
+        online_nodes = self.zk_manager.get_all_nodes()
+        shard_masters = {}
+        buckets: Dict[str, list] = {}
+        errors = []
+        for item in items:
+            shard_id = get_shard_id(key_fn(item))
+            if shard_id not in shard_masters:
+                shard_nodes = self.zk_manager.get_shard_nodes(shard_id)
+                shard_masters[shard_id] = shard_nodes["master"] if shard_nodes else None
+            master_node = shard_masters[shard_id]
+            if master_node is None:
+                errors.append(f"分片{shard_id}未分配节点")
+                continue
+            if master_node not in online_nodes:
+                errors.append(f"主节点{master_node}已离线")
+                continue
+            buckets.setdefault(master_node, []).append(item)
+
+        # 2. 每个主节点一次RPC，并发执行
+        try:
+            futures = {
+                self.search_pool.submit(self._call_node, master_node, online_nodes[master_node], method, bucket): master_node
+                for master_node, bucket in buckets.items()
+            }
+            for future in as_completed(futures):
+                master_node = futures[future]
+                resp = future.result()
+                if resp is None:
+                    errors.append(f"节点{master_node}调用失败")
+                elif not resp.success:
+                    errors.append(f"节点{master_node}：{resp.message}")
+        finally:
+            self._invalidate_search_cache()
+        return len(buckets), errors
+
+    def put_batch(self, data_list: list) -> Response:
+        """按分片主节点分组，每个主节点一次put_batch RPC"""
+        try:
+            node_count, errors = self._route_batch(data_list, lambda data: data.key, "put_batch")
+            if errors:
+                return Response(success=False, message=f"批量写入{len(data_list)}条，部分失败：{'; '.join(errors[:10])}")
+            return Response(success=True, message=f"批量写入{len(data_list)}条成功，涉及{node_count}个主节点")
+        except Exception as e:
+            logger.error(f"PUT_BATCH路由失败：{e}")
+            return Response(success=False, message=str(e))
+
+    def delete_batch(self, keys: list) -> Response:
+        """按分片主节点分组，每个主节点一次delete_batch RPC"""
+        try:
+            node_count, errors = self._route_batch(keys, lambda key: key, "delete_batch")
+            if errors:
+                return Response(success=False, message=f"批量删除{len(keys)}条，部分失败：{'; '.join(errors[:10])}")
+            return Response(success=True, message=f"批量删除{len(keys)}条成功，涉及{node_count}个主节点")
+        except Exception as e:
+            logger.error(f"DELETE_BATCH路由失败：{e}")
+            return Response(success=False, message=str(e))
+
     def delete(self, key: str) -> Response:
         try:
             shard_id = get_shard_id(key)
@@ -142,12 +365,13 @@ class CoordinatorHandler(Iface):
             if not shard_nodes:
                 return Response(success=False, message=f"分片{shard_id}未分配节点")
             master_node = shard_nodes["master"]
-            client, transport = self.rpc_pool.get_client(master_node)
-            if not client:
-                return Response(success=False, message=f"无法连接主节点{master_node}")
-            resp = client.delete(key)
-            self.rpc_pool.release_client(master_node, client, transport)
-            return resp
+            with self.rpc_pool.borrow(master_node) as (client, _):
+                if not client:
+                    return Response(success=False, message=f"无法连接主节点{master_node}")
+                try:
+                    return client.delete(key)
+                finally:
+                    self._invalidate_search_cache()
         except Exception as e:
             logger.error(f"DELETE路由失败：{e}")
             return Response(success=False, message=str(e))
@@ -159,64 +383,166 @@ class CoordinatorHandler(Iface):
             if not shard_nodes:
                 return Response(success=False, message=f"分片{shard_id}未分配节点")
             master_node = shard_nodes["master"]
-            client, transport = self.rpc_pool.get_client(master_node)
-            if not client:
-                return Response(success=False, message=f"无法连接主节点{master_node}")
-            resp = client.get(key)
-            self.rpc_pool.release_client(master_node, client, transport)
-            return resp
+            with self.rpc_pool.borrow(master_node) as (client, _):
+                if not client:
+                    return Response(success=False, message=f"无法连接主节点{master_node}")
+                return client.get(key)
         except Exception as e:
             logger.error(f"GET路由失败：{e}")
             return Response(success=False, message=str(e))
 
     # ---------------- 分布式搜索 ----------------
+    def _invalidate_search_cache(self):
+        """写入/删除完成后使检索缓存失效（版本号递增，进行中的检索结果不会再写入缓存）"""
+        with self.search_cache_lock:
+            self.write_version += 1
+            self.search_cache.clear()
+
+    @staticmethod
+    def _search_cache_key(req: SearchRequest) -> tuple:
+        """检索缓存键：查询向量按float32字节比较，连同影响结果的全部参数"""
+        return (
+            np.asarray(req.query_vector, dtype=np.float32).tobytes(),
+            req.top_k,
+            req.threshold,
+            tuple(sorted(req.filter.items())) if req.filter else None,
+            req.include_vectors is not False,
+            req.ef_search,
+            bool(req.packed_vectors)
+        )
+
+    def _call_node(self, node_id: str, address: str, method: str, *args) -> Response:
+        """调用单个数据节点的RPC（在检索线程池中并发执行），失败返回None"""
+        try:
+            with self.rpc_pool.borrow(node_id, address) as (client, _):
+                return getattr(client, method)(*args) if client else None
+        except Exception as e:
+            # 连接已由borrow丢弃（状态未知，不归还连接池）
+            logger.error(f"{method.upper()}节点{node_id}失败：{e}")
+            return None
+
+    def _fetch_vectors(self, keys: list, key_nodes: list, nodes: Dict[str, str]) -> Dict[str, VectorData]:
+        """
+        按key所在节点分组，并发get_batch拉取最终结果的完整向量
+        :param keys: 最终结果key
+        :param key_nodes: 每个key来自的节点
+        :param nodes: 在线节点快照 node_id -> address
+        :return: key -> VectorData（拉取失败的key不在结果中）
+        """
+        groups: Dict[str, list] = {}
+        for key, node_id in zip(keys, key_nodes):
+            groups.setdefault(node_id, []).append(key)
+        futures = [
+            self.search_pool.submit(self._call_node, node_id, nodes.get(node_id), "get_batch", node_keys)
+            for node_id, node_keys in groups.items()
+        ]
+        fetched = {}
+        try:
+            for future in as_completed(futures, timeout=FANOUT_TIMEOUT):
+                resp = future.result()
+                if resp and resp.success and resp.search_result:
+                    fetched.update(zip(resp.search_result.keys, resp.search_result.vectors))
+        except FutureTimeoutError:
+            logger.warning("拉取最终结果向量超时，未返回的key保留无向量结果")
+        return fetched
+
+    @staticmethod
+    def _unpack_vectors(vectors: list):
+        """数据节点返回的float32字节流向量展开为vector列表（客户端未要求packed_vectors时）"""
+        for vector_data in vectors:
+            if vector_data.packed_vector:
+                vector_data.vector = unpack_vector(vector_data.packed_vector, vector_data.packed_dtype or DEFAULT_PACKED_DTYPE).tolist()
+                vector_data.packed_vector = None
+                vector_data.packed_dtype = None
+
     def search(self, req: SearchRequest) -> Response:
-        """广播搜索 + 全局 top-k 合并"""
+        """检索入口：相同查询在缓存有效期内直接返回，跳过全节点广播"""
+        cache_key = self._search_cache_key(req)
+        now = time.monotonic()
+        with self.search_cache_lock:
+            version = self.write_version
+            cached = self.search_cache.get(cache_key)
+            if cached and cached[0] > now:
+                self.search_cache.move_to_end(cache_key)
+                return cached[1]
+
+        resp = self._search(req)
+        # 部分节点超时的结果不完整，不缓存
+        if resp.success and not resp.message:
+            with self.search_cache_lock:
+                if version == self.write_version:
+                    self.search_cache[cache_key] = (now + SEARCH_CACHE_TTL, resp)
+                    self.search_cache.move_to_end(cache_key)
+                    while len(self.search_cache) > SEARCH_CACHE_SIZE:
+                        self.search_cache.popitem(last=False)
+        return resp
+
+    def _search(self, req: SearchRequest) -> Response:
+        """广播搜索 + 全局 top-k 合并（节点只返回key/分数/元数据，最终top-k再按需拉取向量）"""
         try:
             nodes = self.zk_manager.get_all_nodes()
             if not nodes:
                 return Response(success=False, message="无在线数据节点")
 
-            all_keys = []
-            all_scores = []
-            all_vectors = []
-            seen_keys = set()
-
-            # 扩大子节点 top_k，避免全局 top_k 不准确
+            # 每个节点取 top_k 已足以得到全局 top_k；多节点时再有限多取一些，
+            # 吸收分片迁移后残留在多个节点上的重复key（去重后仍能凑满 top_k）
+            sub_top_k = req.top_k
+            if len(nodes) > 1:
+                sub_top_k += min(req.top_k, SEARCH_OVERFETCH_MAX)
             sub_req = SearchRequest(
                 query_vector=req.query_vector,
-                top_k=req.top_k  # 可根据节点数和删除比例适当调整
+                top_k=sub_top_k,
+                filter=req.filter,
+                threshold=req.threshold,
+                ef_search=req.ef_search,
+                include_vectors=False
             )
 
-            for node_id in nodes:
-                client, transport = self.rpc_pool.get_client(node_id)
-                if not client:
-                    continue
-                resp = client.search(sub_req)
-                logger.info(f"SEARCH节点{node_id}返回：success={resp.success}, results={len(resp.search_result.keys) if resp.search_result else 0}")
-                self.rpc_pool.release_client(node_id, client, transport)
-                if not resp.success or not resp.search_result:
-                    continue
-                for k, s, v in zip(resp.search_result.keys, resp.search_result.scores, resp.search_result.vectors):
-                    if k in seen_keys:
+            # 并发广播到所有节点，按完成顺序收集结果
+            node_results = []
+            futures = {
+                self.search_pool.submit(self._call_node, node_id, address, "search", sub_req): node_id
+                for node_id, address in nodes.items()
+            }
+            pending = set(futures.values())
+            try:
+                for future in as_completed(futures, timeout=FANOUT_TIMEOUT):
+                    node_id = futures[future]
+                    pending.discard(node_id)
+                    resp = future.result()
+                    if not resp or not resp.success or not resp.search_result:
                         continue
-                    seen_keys.add(k)
-                    all_keys.append(k)
-                    all_scores.append(s)
-                    all_vectors.append(v)
+                    r = resp.search_result
+                    logger.info(f"SEARCH节点{node_id}返回：results={len(r.keys)}")
+                    node_results.append(zip(r.scores, r.keys, r.vectors, repeat(node_id)))
+            except FutureTimeoutError:
+                # 慢节点不拖住整个检索：用已返回节点的结果合并
+                logger.warning(f"SEARCH节点响应超时：{sorted(pending)}，使用其余节点结果")
 
-            if not all_scores:
-                return Response(success=True, search_result=SearchResult([], [], []))
+            # 各节点结果已按距离升序：k路归并，只取前 top_k 个（重复key保留距离最小者）
+            final_keys, final_scores, final_vectors, final_nodes = [], [], [], []
+            seen_keys = set()
+            for score, key, vec, node_id in heapq.merge(*node_results, key=itemgetter(0)):
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                final_keys.append(key)
+                final_scores.append(score)
+                final_vectors.append(vec)
+                final_nodes.append(node_id)
+                if len(final_keys) >= req.top_k:
+                    break
 
-            # 全局排序，取 top_k
-            sorted_indices = sorted(range(len(all_scores)), key=lambda i: all_scores[i])
-            top_k = req.top_k
-            final_keys = [all_keys[i] for i in sorted_indices[:top_k]]
-            final_scores = [all_scores[i] for i in sorted_indices[:top_k]]
-            final_vectors = [all_vectors[i] for i in sorted_indices[:top_k]]
+            # 只为最终 top-k 拉取完整向量（拉取失败的保留key+元数据）
+            if req.include_vectors is not False and final_keys:
+                fetched = self._fetch_vectors(final_keys, final_nodes, nodes)
+                final_vectors = [fetched.get(key, vec) for key, vec in zip(final_keys, final_vectors)]
+                if not req.packed_vectors:
+                    self._unpack_vectors(final_vectors)
 
             return Response(
                 success=True,
+                message=f"节点{sorted(pending)}超时，结果可能不完整" if pending else None,
                 search_result=SearchResult(
                     keys=final_keys,
                     scores=final_scores,
@@ -1,9 +1,9 @@
 import sys
 from loguru import logger
-from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket
 from thrift.server import TServer
 from Config import COORDINATOR_DEFAULT_PORT
+from src.utils import create_server_factories
 # 关键修正：导入Thrift生成的Service和Iface
 from src.vector_db import CoordinatorService
 from src.vector_db.CoordinatorService import Iface
@@ -19,12 +19,12 @@ def start_coordinator(port: int = COORDINATOR_DEFAULT_PORT):
 
     # 初始化Thrift服务器
     transport = TSocket.TServerSocket(port=port)
-    tfactory = TTransport.TBufferedTransportFactory()
-    pfactory = TBinaryProtocol.TBinaryProtocolFactory()
+    tfactory, pfactory = create_server_factories()  # 分帧传输 + Compact协议（需与客户端一致）
 
-    server = TServer.TThreadPoolServer(
+    # 每个连接一个线程：客户端/连接池使用长连接，固定大小的线程池会被空闲长连接占满
+    server = TServer.TThreadedServer(
         processor, transport, tfactory, pfactory,
-        worker_count=10
+        daemon=True
     )
 
     logger.info(f"协调节点启动成功，监听端口：{port}")
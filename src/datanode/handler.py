@@ -3,11 +3,14 @@ import numpy as np
 import hnswlib
 import plyvel
 import json
+import struct
 import time
 import os
 import threading
 import signal
 import shutil
+from collections import OrderedDict
+from contextlib import contextmanager
 from loguru import logger
 
 # 原有业务导入（保持不变）
@@ -15,13 +18,30 @@ from src.vector_db.VectorNodeService import Iface
 from src.vector_db.ttypes import VectorData, SearchRequest, SearchResult, Response
 from src.utils.zk_manager import get_zk_manager
 from src.utils.wal_manager import WALManager
-from Config import ZK_NODES_PATH, VECTOR_DIM
+from src.utils.vector_utils import data_to_vector, normalize_vector, list_to_matrix, normalize_matrix
+from src.utils.put_batcher import ShardBatcher
+from src.utils.rw_lock import RWLock
+from Config import (
+    ZK_NODES_PATH, VECTOR_DIM, CHECKPOINT_INTERVAL, CHECKPOINT_KEEP_N,
+    NODE_PUT_COALESCE_MAX_BATCH, NODE_PUT_COALESCE_MAX_WAIT_MS,
+    HNSW_SPACE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, HNSW_MAX_ELEMENTS,
+    LEVELDB_WRITE_BUFFER_SIZE, LEVELDB_MAX_OPEN_FILES, LEVELDB_BLOCK_SIZE,
+    LEVELDB_BLOOM_FILTER_BITS, LEVELDB_LRU_CACHE_SIZE, NODE_META_CACHE_SIZE
+)
+
+# LevelDB反向键空间前缀：REV_PREFIX + hnsw_id -> key（以\x00开头，与业务key区分）
+REV_PREFIX = b"\x00r:"
+
+# LevelDB正向记录的二进制格式：版本字节 + <hnsw_id:int64, meta_len:uint32> + 元数据JSON + float32向量
+# 旧版本的JSON记录以'{'开头，按首字节区分，两种格式可共存
+VALUE_FORMAT_V1 = b"\x01"
+VALUE_HEADER = struct.Struct("<qI")
+VALUE_HEADER_END = len(VALUE_FORMAT_V1) + VALUE_HEADER.size
 
 class VectorNodeHandler:
     def __init__(self, node_id):
         self.node_id = node_id
-        self.index_lock = threading.RLock()  # 全局并发锁
-        self.leveldb_lock = threading.Lock()  # LevelDB专属锁
+        self.index_lock = RWLock()  # 索引读写锁：检索/批量读取并发持有读锁，写入/删除/重建/快照持有写锁
         
         # 1. 本地存储目录初始化
         self.local_storage_dir = f"./Static/local_storage/{self.node_id}"
@@ -29,7 +49,7 @@ class VectorNodeHandler:
         self.leveldb_dir = os.path.join(self.local_storage_dir, "leveldb_data")
         self.wal_dir = os.path.join(self.local_storage_dir, "wal")
         self.checkpoint_dir = os.path.join(self.local_storage_dir, "checkpoint")
-        self.deleted_ids_path = os.path.join(self.local_storage_dir, "deleted_ids.json")
+        self.deleted_ids_path = os.path.join(self.local_storage_dir, "deleted_ids.bin")
         
         # 创建目录
         for dir_path in [self.hnsw_index_dir, self.leveldb_dir, self.wal_dir, self.checkpoint_dir]:
@@ -39,38 +59,72 @@ class VectorNodeHandler:
         self.zk_manager = get_zk_manager()
         self.wal_manager = WALManager(self.wal_dir)
         self.vector_dim = VECTOR_DIM
+        # 内积空间下写入与查询向量先归一化（内积即余弦相似度，走SIMD内积而非L2差平方）
+        self.normalize = HNSW_SPACE == "ip"
         self.next_hnsw_id = 0  # HNSW自增ID
         self.deleted_ids = set()  # 软删除ID集合（HNSW不支持物理删除）
+        self._deleted_pending = []  # 尚未追加到deleted_ids.bin的新删除ID
+        self.id_key_map = {}  # HNSW ID -> key 反向映射（内存常驻，启动时由LevelDB反向键空间加载）
+        self.ops_since_checkpoint = 0  # 上次快照后的写入/删除次数
+        self._checkpoint_running = False  # 后台快照线程是否在运行（index_lock内读写）
+        # 单条写入的预分配缓冲区（原地填充，避免每次调用分配数组；仅在index_lock内使用）
+        self._id_scratch = np.empty(1, dtype=np.int64)
+        self._vec_scratch = np.empty((1, self.vector_dim), dtype=np.float32)
+        # 检索查询向量的线程本地缓冲区（检索在index_lock外解析查询，各Thrift工作线程各用一份）
+        self._tls = threading.local()
+        # 元数据LRU缓存：hnsw_id -> metadata（覆盖写会分配新ID，同一ID的元数据不变，无需按key失效）
+        self.meta_cache = OrderedDict()
+        self.meta_cache_lock = threading.Lock()  # 检索在读锁下并发访问缓存
         
         # 3. HNSWlib 初始化（核心索引）
-        self.hnsw_index = hnswlib.Index(space='l2', dim=self.vector_dim)  # L2距离，可改为cosine
+        self.hnsw_index = hnswlib.Index(space=HNSW_SPACE, dim=self.vector_dim)
         self._init_hnsw_index()
         
         # 4. LevelDB 初始化（存储key→(hnsw_id, vector, metadata)）
-        self.leveldb = plyvel.DB(self.leveldb_dir, create_if_missing=True, write_buffer_size=64*1024*1024)
+        self.leveldb = self._open_leveldb()
         
-        # 5. 加载软删除ID + 快照恢复
+        # 5. 加载软删除ID + 反向映射 + 快照恢复
         self._load_deleted_ids()
+        self._load_id_key_map()
+        self._sync_next_hnsw_id()
         self.load_from_checkpoint()
+
+        # 6. 单条写入合并器：并发的单条PUT合并为一次put_batch
+        self.put_batcher = ShardBatcher(
+            self.node_id, lambda _node_id, data_list: self.put_batch(data_list),
+            max_batch=NODE_PUT_COALESCE_MAX_BATCH, max_wait_ms=NODE_PUT_COALESCE_MAX_WAIT_MS
+        )
         
-        # 6. 注册退出钩子
+        # 7. 注册退出钩子
         import atexit
         atexit.register(self._on_exit)
 
     # ========== 退出时保存快照 + 清理资源 ==========
     def _on_exit(self):
         logger.info("执行退出逻辑：保存快照 + 关闭资源...")
-        with self.index_lock:
+        with self.index_lock.write():
             # 1. 保存HNSW索引
-            self.hnsw_index.save_index(os.path.join(self.hnsw_index_dir, "index.bin"))
+            self._save_index(os.path.join(self.hnsw_index_dir, "index.bin"))
             # 2. 保存软删除ID
             self._save_deleted_ids()
             # 3. 保存快照
             self.save_checkpoint()
-            # 4. 关闭LevelDB
+            # 4. 关闭LevelDB与WAL文件
             self.leveldb.close()
+            self.wal_manager.close()
         logger.info("退出逻辑执行完成")
 
+    def _open_leveldb(self) -> plyvel.DB:
+        """按配置打开LevelDB（启动与快照恢复共用同一组参数）"""
+        return plyvel.DB(
+            self.leveldb_dir, create_if_missing=True,
+            write_buffer_size=LEVELDB_WRITE_BUFFER_SIZE,
+            max_open_files=LEVELDB_MAX_OPEN_FILES,
+            block_size=LEVELDB_BLOCK_SIZE,
+            bloom_filter_bits=LEVELDB_BLOOM_FILTER_BITS,
+            lru_cache_size=LEVELDB_LRU_CACHE_SIZE
+        )
+
     # ========== HNSWlib 核心操作 ==========
     def _init_hnsw_index(self):
         """初始化HNSW索引（加载已有索引或新建）"""
@@ -78,121 +132,330 @@ class VectorNodeHandler:
         if os.path.exists(index_path):
             # 加载已有索引
             self.hnsw_index.load_index(index_path)
+            self.hnsw_index.set_ef(HNSW_EF_SEARCH)
             # 恢复next_hnsw_id（索引中已有的元素数）
             self.next_hnsw_id = self.hnsw_index.get_current_count()
             logger.info(f"加载HNSW索引成功，当前元素数：{self.next_hnsw_id}")
         else:
             # 新建索引（参数：max_elements=初始容量，ef_construction=构建时的ef，M=邻居数）
-            self.hnsw_index.init_index(max_elements=1000000, ef_construction=128, M=32)
+            self.hnsw_index.init_index(max_elements=HNSW_MAX_ELEMENTS, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
             # 设置查询时的ef（越大越准，越慢）
-            self.hnsw_index.set_ef(64)
+            self.hnsw_index.set_ef(HNSW_EF_SEARCH)
             logger.info(f"初始化新HNSW索引，维度：{self.vector_dim}")
 
     def _rebuild_hnsw_index(self):
         """定期重建HNSW索引（清理已删除ID，释放空间）"""
         logger.info("开始重建HNSW索引（清理已删除ID）...")
-        with self.index_lock:
-            # 1. 导出有效数据
-            valid_ids = []
-            valid_vectors = []
-            for hnsw_id in range(self.next_hnsw_id):
-                if hnsw_id not in self.deleted_ids:
-                    # 从LevelDB获取原始向量
-                    key = self._get_key_by_hnsw_id(hnsw_id)
-                    if key:
-                        vec_data = self.leveldb.get(key.encode('utf-8'))
-                        if vec_data:
-                            vec_dict = json.loads(vec_data)
-                            valid_vectors.append(np.array(vec_dict['vector'], dtype=np.float32))
-                            valid_ids.append(hnsw_id)
+        with self.index_lock.write():
+            # 1. 导出有效数据：只遍历反向映射中的有效ID（不再逐个检查0~next_hnsw_id），
+            #    向量直接解码进预分配的(N, dim)矩阵
+            valid_ids = np.fromiter(self.id_key_map.keys(), dtype=np.int64, count=len(self.id_key_map))
+            valid_vectors = np.empty((len(valid_ids), self.vector_dim), dtype=np.float32)
+            count = 0
+            for hnsw_id in valid_ids.tolist():
+                vec_data = self.leveldb.get(self.id_key_map[hnsw_id].encode('utf-8'))
+                if vec_data:
+                    valid_vectors[count] = self._decode_value(vec_data)['vector']
+                    valid_ids[count] = hnsw_id
+                    count += 1
+            valid_ids, valid_vectors = valid_ids[:count], valid_vectors[:count]
             
-            # 2. 重建索引
-            self.hnsw_index = hnswlib.Index(space='l2', dim=self.vector_dim)
-            self.hnsw_index.init_index(max_elements=len(valid_vectors) + 10000, ef_construction=128, M=32)
-            self.hnsw_index.add_items(valid_vectors, valid_ids)
-            self.hnsw_index.set_ef(64)
+            # 2. 重建索引（整批一次add_items，按CPU核数并行插入）
+            self.hnsw_index = hnswlib.Index(space=HNSW_SPACE, dim=self.vector_dim)
+            self.hnsw_index.init_index(max_elements=len(valid_vectors) + 10000, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+            if count:
+                self.hnsw_index.add_items(valid_vectors, valid_ids, num_threads=os.cpu_count() or 1)
+            self.hnsw_index.set_ef(HNSW_EF_SEARCH)
             # 3. 保存新索引
-            self.hnsw_index.save_index(os.path.join(self.hnsw_index_dir, "index.bin"))
+            self._save_index(os.path.join(self.hnsw_index_dir, "index.bin"))
             # 4. 清空已删除ID
-            self.deleted_ids.clear()
-            self._save_deleted_ids()
+            self._reset_deleted_ids(set())
         
         logger.info(f"HNSW索引重建完成，有效元素数：{len(valid_vectors)}")
 
     # ========== 软删除ID管理 ==========
+    @staticmethod
+    def _dump_ids(ids) -> bytes:
+        """ID集合序列化为小端int64定长数组（每个ID 8字节）"""
+        return np.fromiter(ids, dtype="<i8", count=len(ids)).tobytes()
+
+    @staticmethod
+    def _read_ids(path: str) -> set:
+        """读取ID文件：.bin为int64数组，.json为旧版本的JSON列表"""
+        if path.endswith(".json"):
+            with open(path, 'r', encoding='utf-8') as f:
+                return set(json.load(f))
+        return set(np.fromfile(path, dtype="<i8").tolist())
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        """先写临时文件再原子替换，写入中途崩溃不会损坏原文件"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _save_index(self, path: str):
+        """原子保存HNSW索引文件"""
+        tmp_path = f"{path}.tmp"
+        self.hnsw_index.save_index(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _mark_deleted(self, hnsw_id: int):
+        """
+        软删除ID（调用方持有index_lock），新ID记入待追加列表；
+        同时在HNSW中标记删除，检索时直接跳过，不再占用候选名额
+        """
+        if hnsw_id not in self.deleted_ids:
+            self.deleted_ids.add(hnsw_id)
+            self._deleted_pending.append(hnsw_id)
+            with self.meta_cache_lock:
+                self.meta_cache.pop(hnsw_id, None)
+            try:
+                self.hnsw_index.mark_deleted(hnsw_id)
+            except RuntimeError:
+                # 索引中没有该ID（如已由重建清理），只记录在软删除集合中
+                pass
+
     def _save_deleted_ids(self):
-        """保存已删除ID到文件"""
-        with open(self.deleted_ids_path, 'w', encoding='utf-8') as f:
-            json.dump(list(self.deleted_ids), f)
+        """新增的已删除ID追加到文件末尾（只写上次保存后的增量，不重写整个集合）"""
+        if not self._deleted_pending:
+            return
+        with open(self.deleted_ids_path, "ab") as f:
+            f.write(self._dump_ids(self._deleted_pending))
+        self._deleted_pending.clear()
+
+    def _reset_deleted_ids(self, ids: set):
+        """整体替换已删除ID集合，并按该集合重写文件"""
+        self.deleted_ids = ids
+        self._deleted_pending.clear()
+        self._write_atomic(self.deleted_ids_path, self._dump_ids(ids))
 
     def _load_deleted_ids(self):
-        """加载已删除ID"""
+        """加载已删除ID（旧版本的deleted_ids.json一次性转换为deleted_ids.bin）"""
+        legacy_path = os.path.join(self.local_storage_dir, "deleted_ids.json")
         if os.path.exists(self.deleted_ids_path):
-            with open(self.deleted_ids_path, 'r', encoding='utf-8') as f:
-                self.deleted_ids = set(json.load(f))
-            logger.info(f"加载已删除ID数：{len(self.deleted_ids)}")
+            self.deleted_ids = self._read_ids(self.deleted_ids_path)
+        elif os.path.exists(legacy_path):
+            self._reset_deleted_ids(self._read_ids(legacy_path))
+            os.remove(legacy_path)
+        else:
+            return
+        logger.info(f"加载已删除ID数：{len(self.deleted_ids)}")
+
+    # ========== 元数据缓存 ==========
+    def _cache_meta(self, hnsw_id: int, metadata: dict):
+        """写入元数据缓存，超出容量时淘汰最久未使用的条目"""
+        with self.meta_cache_lock:
+            self.meta_cache[hnsw_id] = metadata
+            self.meta_cache.move_to_end(hnsw_id)
+            while len(self.meta_cache) > NODE_META_CACHE_SIZE:
+                self.meta_cache.popitem(last=False)
+
+    def _cached_meta(self, hnsw_id: int):
+        """读取缓存的元数据，未命中返回None"""
+        with self.meta_cache_lock:
+            metadata = self.meta_cache.get(hnsw_id)
+            if metadata is not None:
+                self.meta_cache.move_to_end(hnsw_id)
+            return metadata
 
     # ========== LevelDB 辅助方法（key-HNSW ID映射）==========
+    @staticmethod
+    def _encode_value(hnsw_id: int, vec: np.ndarray, metadata: dict) -> bytes:
+        """正向记录编码为二进制（向量直接取float32字节，不经过tolist/JSON）"""
+        meta = json.dumps(metadata, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return b"".join((
+            VALUE_FORMAT_V1, VALUE_HEADER.pack(hnsw_id, len(meta)), meta,
+            np.asarray(vec, dtype=np.float32).tobytes()
+        ))
+
+    @staticmethod
+    def _decode_value(buf: bytes) -> dict:
+        """
+        解码正向记录
+        :return: {"hnsw_id", "vector", "metadata"}，二进制格式下vector为np.frombuffer零拷贝只读视图
+        """
+        if buf[:1] != VALUE_FORMAT_V1:
+            return json.loads(buf)
+        hnsw_id, meta_len = VALUE_HEADER.unpack_from(buf, len(VALUE_FORMAT_V1))
+        meta_end = VALUE_HEADER_END + meta_len
+        return {
+            "hnsw_id": hnsw_id,
+            "vector": np.frombuffer(buf, dtype=np.float32, offset=meta_end),
+            "metadata": json.loads(buf[VALUE_HEADER_END:meta_end]) if meta_len else {}
+        }
+
+    @staticmethod
+    def _decode_hnsw_id(buf: bytes) -> int:
+        """只解析正向记录中的hnsw_id（二进制格式下只读头部）"""
+        if buf[:1] != VALUE_FORMAT_V1:
+            return json.loads(buf)['hnsw_id']
+        return VALUE_HEADER.unpack_from(buf, len(VALUE_FORMAT_V1))[0]
+
     def _get_hnsw_id_by_key(self, key: str) -> int:
         """根据key查HNSW ID"""
-        with self.leveldb_lock:
-            vec_data = self.leveldb.get(key.encode('utf-8'))
-            if not vec_data:
-                return -1
-            vec_dict = json.loads(vec_data)
-            return vec_dict['hnsw_id']
+        vec_data = self.leveldb.get(key.encode('utf-8'))
+        if not vec_data:
+            return -1
+        return self._decode_hnsw_id(vec_data)
 
     def _get_key_by_hnsw_id(self, hnsw_id: int) -> str:
-        """根据HNSW ID查key（反向映射）"""
-        with self.leveldb_lock:
-            # 遍历LevelDB（小数据量可用，大数据量建议维护反向映射表）
-            for key, value in self.leveldb.iterator():
-                vec_dict = json.loads(value)
-                if vec_dict['hnsw_id'] == hnsw_id:
-                    return key.decode('utf-8')
-            return ""
+        """根据HNSW ID查key（反向映射，O(1)哈希查找）"""
+        return self.id_key_map.get(hnsw_id, "")
+
+    def _sync_next_hnsw_id(self):
+        """自增ID不小于任何已用ID（索引文件可能落后于LevelDB，且重建后元素数小于最大ID）"""
+        used_max = max(max(self.id_key_map, default=-1), max(self.deleted_ids, default=-1))
+        self.next_hnsw_id = max(self.next_hnsw_id, used_max + 1)
+
+    @staticmethod
+    def _rev_key(hnsw_id: int) -> bytes:
+        """反向键空间中hnsw_id对应的LevelDB key"""
+        return REV_PREFIX + str(hnsw_id).encode()
+
+    def _load_id_key_map(self):
+        """
+        从LevelDB反向键空间加载反向映射（仅启动/恢复快照时执行一次，只读短小的反向记录，不解析向量JSON）
+        旧版本数据没有反向键空间时，全量扫描一次正向记录并补写反向记录
+        """
+        id_key_map = {}
+        for rev_key, key in self.leveldb.iterator(prefix=REV_PREFIX):
+            id_key_map[int(rev_key[len(REV_PREFIX):])] = key.decode('utf-8')
+        if not id_key_map:
+            with self.leveldb.write_batch(sync=False) as wb:
+                for key, value in self.leveldb.iterator():
+                    if key.startswith(REV_PREFIX):
+                        continue
+                    hnsw_id = self._decode_hnsw_id(value)
+                    id_key_map[hnsw_id] = key.decode('utf-8')
+                    wb.put(self._rev_key(hnsw_id), key)
+            if id_key_map:
+                logger.info(f"补写LevelDB反向键空间：{len(id_key_map)}条")
+        self.id_key_map = id_key_map
+        logger.info(f"加载HNSW ID反向映射：{len(id_key_map)}条")
 
     # ========== 快照功能 ==========
+    def _maybe_checkpoint(self, op_count: int = 1):
+        """
+        累计写入/删除次数，达到CHECKPOINT_INTERVAL时在后台线程保存快照（调用方持有index_lock）
+        触发快照的写入请求直接返回，不等待索引序列化；同一时刻只有一个后台快照
+        """
+        self.ops_since_checkpoint += op_count
+        if self.ops_since_checkpoint >= CHECKPOINT_INTERVAL and not self._checkpoint_running:
+            self._checkpoint_running = True
+            threading.Thread(target=self._background_checkpoint, daemon=True, name="checkpoint").start()
+
+    def _background_checkpoint(self):
+        """后台快照：持有index_lock保证索引、LevelDB、软删除ID三者一致"""
+        try:
+            with self.index_lock.write():
+                self.save_checkpoint()
+        except Exception as e:
+            logger.error(f"后台快照失败：{e}")
+        finally:
+            with self.index_lock.write():
+                self._checkpoint_running = False
+
     def save_checkpoint(self):
-        """保存全量快照：HNSW索引 + LevelDB数据 + 软删除ID"""
+        """
+        保存全量快照：HNSW索引 + LevelDB数据 + 软删除ID
+        先写入临时目录，完整写完后再原子重命名，中途崩溃不会留下不完整的快照
+        """
         checkpoint_ts = int(time.time() * 1000)
-        checkpoint_path = os.path.join(self.checkpoint_dir, f"checkpoint_{checkpoint_ts}")
+        final_path = os.path.join(self.checkpoint_dir, f"checkpoint_{checkpoint_ts}")
+        checkpoint_path = f"{final_path}.tmp"
+        shutil.rmtree(checkpoint_path, ignore_errors=True)
         os.makedirs(checkpoint_path, exist_ok=True)
         
         # 1. 保存HNSW索引
         hnsw_checkpoint_path = os.path.join(checkpoint_path, "index.bin")
         self.hnsw_index.save_index(hnsw_checkpoint_path)
         
-        # 2. 拷贝LevelDB数据
+        # 2. LevelDB数据：调用方持有index_lock写锁，短暂关闭库（停止compaction，文件一致）后
+        #    SST硬链接 + 元数据/日志拷贝，再重新打开
         leveldb_checkpoint_path = os.path.join(checkpoint_path, "leveldb_data")
-        shutil.copytree(self.leveldb_dir, leveldb_checkpoint_path, dirs_exist_ok=True)
+        self.leveldb.close()
+        try:
+            self._link_leveldb(self.leveldb_dir, leveldb_checkpoint_path)
+        finally:
+            self.leveldb = self._open_leveldb()
         
         # 3. 保存软删除ID
-        deleted_ids_checkpoint_path = os.path.join(checkpoint_path, "deleted_ids.json")
-        with open(deleted_ids_checkpoint_path, 'w', encoding='utf-8') as f:
-            json.dump(list(self.deleted_ids), f)
+        deleted_ids_checkpoint_path = os.path.join(checkpoint_path, "deleted_ids.bin")
+        with open(deleted_ids_checkpoint_path, 'wb') as f:
+            f.write(self._dump_ids(self.deleted_ids))
+        self._save_deleted_ids()
         
         # 4. 记录WAL位置
         with open(os.path.join(checkpoint_path, "wal_pos.txt"), "w") as f:
             f.write(str(checkpoint_ts))
-        
-        logger.info(f"快照保存成功：{checkpoint_path}")
+
+        os.replace(checkpoint_path, final_path)
+        self.ops_since_checkpoint = 0
+        logger.info(f"快照保存成功：{final_path}")
+        self._prune_checkpoints()
+
+    @staticmethod
+    def _link_leveldb(src_dir: str, dst_dir: str):
+        """
+        复制已关闭的LevelDB目录（保存快照时的当前库、恢复时的快照库）：
+        SST文件写入后不再修改，直接硬链接（不同文件系统时退化为拷贝）；CURRENT/MANIFEST/日志等拷贝
+        """
+        shutil.rmtree(dst_dir, ignore_errors=True)
+        os.makedirs(dst_dir)
+        for name in os.listdir(src_dir):
+            if name in ("LOCK", "LOG", "LOG.old"):
+                continue
+            src, dst = os.path.join(src_dir, name), os.path.join(dst_dir, name)
+            if name.endswith((".ldb", ".sst")):
+                try:
+                    os.link(src, dst)
+                    continue
+                except OSError:
+                    pass
+            shutil.copy2(src, dst)
+
+    def _list_checkpoints(self) -> list:
+        """已完成的快照目录名（.tmp为未写完的快照，忽略）"""
+        return [
+            d for d in os.listdir(self.checkpoint_dir)
+            if d.startswith("checkpoint_") and not d.endswith(".tmp")
+        ]
+
+    @staticmethod
+    def _checkpoint_ts(name: str) -> int:
+        return int(name[len("checkpoint_"):])
+
+    def _prune_checkpoints(self):
+        """只保留最新的CHECKPOINT_KEEP_N个快照（调用方持有index_lock，不会与恢复并发）"""
+        checkpoints = sorted(self._list_checkpoints(), key=self._checkpoint_ts)
+        for name in checkpoints[:-CHECKPOINT_KEEP_N]:
+            shutil.rmtree(os.path.join(self.checkpoint_dir, name), ignore_errors=True)
+            logger.info(f"删除过期快照：{name}")
 
     def load_from_checkpoint(self):
         """从最新快照恢复"""
-        checkpoint_dirs = [d for d in os.listdir(self.checkpoint_dir) if d.startswith("checkpoint_")]
-        if not checkpoint_dirs:
-            logger.info("无快照，使用当前数据")
+        latest_checkpoint = max(self._list_checkpoints(), key=self._checkpoint_ts, default=None)
+        if latest_checkpoint is None:
+            # 写入路径不再逐条保存索引：无快照时先由LevelDB数据重建索引，
+            # 再全量重放WAL（LevelDB写入不同步落盘，已fsync到WAL的写入在系统崩溃后可能不在LevelDB中）
+            if self.id_key_map:
+                logger.info("无快照，由LevelDB数据重建HNSW索引")
+                self._rebuild_hnsw_index()
+            else:
+                logger.info("无快照，使用当前数据")
+            self.wal_manager.replay(self)
             return
         
         # 加载最新快照
-        latest_checkpoint = sorted(checkpoint_dirs)[-1]
         checkpoint_path = os.path.join(self.checkpoint_dir, latest_checkpoint)
         
         # 1. 恢复HNSW索引
         hnsw_checkpoint_path = os.path.join(checkpoint_path, "index.bin")
         if os.path.exists(hnsw_checkpoint_path):
-            self.hnsw_index.load_index(hnsw_checkpoint_path,max_elements=1000000)
+            self.hnsw_index.load_index(hnsw_checkpoint_path, max_elements=HNSW_MAX_ELEMENTS)
+            self.hnsw_index.set_ef(HNSW_EF_SEARCH)
             self.next_hnsw_id = self.hnsw_index.get_current_count()
             logger.info(f"恢复HNSW索引：{hnsw_checkpoint_path}")
         
@@ -200,17 +463,21 @@ class VectorNodeHandler:
         leveldb_checkpoint_path = os.path.join(checkpoint_path, "leveldb_data")
         if os.path.exists(leveldb_checkpoint_path):
             self.leveldb.close()
-            shutil.rmtree(self.leveldb_dir, ignore_errors=True)
-            shutil.copytree(leveldb_checkpoint_path, self.leveldb_dir)
-            self.leveldb = plyvel.DB(self.leveldb_dir, create_if_missing=True)
+            self._link_leveldb(leveldb_checkpoint_path, self.leveldb_dir)
+            self.leveldb = self._open_leveldb()
+            self._load_id_key_map()
+            with self.meta_cache_lock:
+                self.meta_cache.clear()
             logger.info(f"恢复LevelDB数据：{leveldb_checkpoint_path}")
         
         # 3. 恢复软删除ID
-        deleted_ids_checkpoint_path = os.path.join(checkpoint_path, "deleted_ids.json")
-        if os.path.exists(deleted_ids_checkpoint_path):
-            with open(deleted_ids_checkpoint_path, 'r', encoding='utf-8') as f:
-                self.deleted_ids = set(json.load(f))
-            logger.info(f"恢复已删除ID数：{len(self.deleted_ids)}")
+        for name in ("deleted_ids.bin", "deleted_ids.json"):
+            deleted_ids_checkpoint_path = os.path.join(checkpoint_path, name)
+            if os.path.exists(deleted_ids_checkpoint_path):
+                self._reset_deleted_ids(self._read_ids(deleted_ids_checkpoint_path))
+                logger.info(f"恢复已删除ID数：{len(self.deleted_ids)}")
+                break
+        self._sync_next_hnsw_id()
         
         # 4. 重放增量WAL
         with open(os.path.join(checkpoint_path, "wal_pos.txt"), "r") as f:
@@ -220,8 +487,12 @@ class VectorNodeHandler:
 
     # ========== 核心业务接口 ==========
     def put(self, data: VectorData, replay_mode=False) -> Response:
+        """
+        单条写入：在线写入交给合并器，与并发到达的其它单条写入合并为一次put_batch（一次add_items）后返回；
+        重放WAL时逐条直接写入索引，不再写WAL
+        """
         key = data.key
-        vec = np.array(data.vector, dtype=np.float32)
+        vec = data_to_vector(data)
         metadata = data.metadata or {}
 
         # ===== 基础合法性检查（防止维度污染索引）=====
@@ -231,7 +502,19 @@ class VectorNodeHandler:
                 message=f"vector dim mismatch: expect {self.vector_dim}, got {vec.shape}"
             )
 
-        with self.index_lock:
+        if not replay_mode:
+            return self.put_batcher.submit(data).result()
+        if self.normalize:
+            vec = normalize_vector(vec)
+
+        with self.index_lock.write():
+            # ===== 0. 内容未变化的覆盖写直接跳过（不消耗新ID，也不产生软删除）=====
+            old_data = self.leveldb.get(key.encode("utf-8"))
+            old_dict = self._decode_value(old_data) if old_data else None
+            if old_dict is not None and self._is_unchanged(old_dict, vec, metadata):
+                logger.info(f"PUT skipped (unchanged): key={key}")
+                return Response(success=True, message=f"key={key} 未变化，跳过写入")
+
             # ===== 1. 索引健康检查（关键修复点）=====
             try:
                 current_count = self.hnsw_index.get_current_count()
@@ -242,33 +525,28 @@ class VectorNodeHandler:
                 current_count = self.hnsw_index.get_current_count()
                 max_elements = self.hnsw_index.get_max_elements()
 
-            # ===== 2. 防止 index 已满或被异常污染 =====
+            # ===== 2. 容量已满时原地扩容（不重建，已有元素不动）=====
             if current_count >= max_elements:
-                logger.error(
-                    f"HNSW index full or corrupted "
-                    f"(current={current_count}, max={max_elements}), rebuilding"
-                )
-                self._rebuild_hnsw_index()
+                logger.info(f"HNSW index full (current={current_count}, max={max_elements}), resizing")
+                self.hnsw_index.resize_index(max_elements * 2)
 
             # ===== 3. 处理 key 覆盖（软删除旧 ID）=====
-            old_hnsw_id = self._get_hnsw_id_by_key(key)
-            if old_hnsw_id != -1:
-                self.deleted_ids.add(old_hnsw_id)
-                with self.leveldb_lock:
-                    self.leveldb.delete(key.encode("utf-8"))
+            if old_dict is not None:
+                old_hnsw_id = old_dict["hnsw_id"]
+                self._mark_deleted(old_hnsw_id)
+                self.id_key_map.pop(old_hnsw_id, None)
                 logger.info(
                     f"PUT overwrite: key={key}, old_hnsw_id={old_hnsw_id} marked deleted"
                 )
 
             # ===== 4. 分配新 HNSW ID（连续、受控）=====
             new_hnsw_id = self.next_hnsw_id
+            self._vec_scratch[0] = vec
 
             # ===== 5. 写入 HNSW（单点失败即中断）=====
             try:
-                self.hnsw_index.add_items(
-                    vec.reshape(1, -1),
-                    np.array([new_hnsw_id], dtype=np.int64)
-                )
+                self._id_scratch[0] = new_hnsw_id
+                self.hnsw_index.add_items(self._vec_scratch, self._id_scratch)
             except RuntimeError as e:
                 # 这是你现在遇到的核心异常兜底点
                 logger.error(f"HNSW add_items failed, rebuilding index: {e}")
@@ -276,52 +554,138 @@ class VectorNodeHandler:
 
                 # rebuild 后重试一次（只允许一次）
                 new_hnsw_id = self.next_hnsw_id
-                self.hnsw_index.add_items(
-                    vec.reshape(1, -1),
-                    np.array([new_hnsw_id], dtype=np.int64)
-                )
+                self._id_scratch[0] = new_hnsw_id
+                self.hnsw_index.add_items(self._vec_scratch, self._id_scratch)
 
             # ===== 6. ID 递增（只在 add 成功后）=====
             self.next_hnsw_id += 1
 
-            # ===== 7. 写入 LevelDB（原子性在锁内）=====
-            vec_dict = {
-                "hnsw_id": new_hnsw_id,
-                "vector": vec.tolist(),
-                "metadata": metadata
-            }
-            with self.leveldb_lock:
-                self.leveldb.put(
-                    key.encode("utf-8"),
-                    json.dumps(vec_dict).encode("utf-8")
-                )
-
-            # ===== 8. WAL + 持久化（非 replay）=====
-            if not replay_mode:
-                try:
-                    self.hnsw_index.save_index(
-                        os.path.join(self.hnsw_index_dir, "index.bin")
-                    )
-                    self._save_deleted_ids()
-                    self.wal_manager.write_log(
-                        "PUT", key, data.vector, metadata
-                    )
-                except Exception as e:
-                    logger.error(f"Persistence failed after PUT key={key}: {e}")
-
-                # ===== 9. 周期性维护 =====
-                if self.next_hnsw_id % 200000 == 0:
-                    self._rebuild_hnsw_index()
-
-                if self.next_hnsw_id % 2000 == 0:
-                    self.save_checkpoint()
+            # ===== 7. 写入 LevelDB（正向记录与反向记录同一WriteBatch原子写入）=====
+            with self.leveldb.write_batch(sync=False) as wb:
+                if old_dict is not None:
+                    wb.delete(self._rev_key(old_dict["hnsw_id"]))
+                wb.put(key.encode("utf-8"), self._encode_value(new_hnsw_id, vec, metadata))
+                wb.put(self._rev_key(new_hnsw_id), key.encode("utf-8"))
+            self.id_key_map[new_hnsw_id] = key
+            self._cache_meta(new_hnsw_id, metadata)
 
         logger.info(f"PUT success: key={key}, hnsw_id={new_hnsw_id}")
         return Response(success=True, message=f"key={key} 写入成功")
 
 
+    @staticmethod
+    def _is_unchanged(old_dict: dict, vec: np.ndarray, metadata: dict) -> bool:
+        """已存储的向量与元数据是否与本次写入完全相同"""
+        return old_dict["metadata"] == metadata and np.array_equal(
+            np.asarray(old_dict["vector"], dtype=np.float32), vec
+        )
+
+    def put_batch(self, data_list: list, replay_mode=False) -> Response:
+        """
+        批量写入/更新向量：整批堆叠为(B, dim)矩阵一次add_items，LevelDB/WAL各一次批量写入
+        :param data_list: VectorData列表（同一批内重复的key以最后一条为准）
+        :param replay_mode: WAL重放时为True，不再写WAL、不触发快照
+        :return: 全部成功时success=True；部分失败时failed_keys为失败的key（其余已写入），message中列出原因
+        """
+        # 1. 解码 + 维度校验（同一key保留最后一条）
+        failed = []
+        failed_keys = []
+        batch = {}
+        wal_seq = None
+        for data in data_list:
+            try:
+                vec = data_to_vector(data)
+            except ValueError as e:
+                vec, reason = None, str(e)
+            else:
+                reason = f"vector dim mismatch: expect {self.vector_dim}, got {vec.shape}"
+            if vec is None or vec.ndim != 1 or vec.shape[0] != self.vector_dim:
+                failed.append(f"{data.key}({reason})")
+                failed_keys.append(data.key)
+                batch.pop(data.key, None)
+                continue
+            batch[data.key] = (vec, data.metadata or {})
+
+        # 内积空间：整批堆叠后一次按行归一化（在未变化检查之前，与已存储的归一化向量比较）
+        if self.normalize and batch:
+            mat = normalize_matrix(np.stack([vec for vec, _ in batch.values()]))
+            batch = {key: (mat[row], meta) for row, (key, (_, meta)) in enumerate(batch.items())}
+
+        with self.index_lock.write():
+            # 内容未变化的覆盖写跳过；其余记录已存在时的旧值，后面软删除旧ID
+            old_ids = {}
+            for key in list(batch.keys()):
+                old_data = self.leveldb.get(key.encode("utf-8"))
+                if not old_data:
+                    continue
+                old_dict = self._decode_value(old_data)
+                if self._is_unchanged(old_dict, *batch[key]):
+                    del batch[key]
+                else:
+                    old_ids[key] = old_dict["hnsw_id"]
+
+            if batch:
+                keys = list(batch.keys())
+                vecs = np.empty((len(keys), self.vector_dim), dtype=np.float32)
+                for row, key in enumerate(keys):
+                    vecs[row] = batch[key][0]
+
+                # 2. 容量不足时扩容（一次扩到足够大，避免逐条触发）
+                needed = self.hnsw_index.get_current_count() + len(keys)
+                if needed > self.hnsw_index.get_max_elements():
+                    self.hnsw_index.resize_index(max(needed, self.hnsw_index.get_max_elements() * 2))
+
+                # 3. 分配连续ID，整批写入HNSW
+                start_id = self.next_hnsw_id
+                ids = np.arange(start_id, start_id + len(keys), dtype=np.int64)
+                self.hnsw_index.add_items(vecs, ids)
+                self.next_hnsw_id += len(keys)
+
+                # 4. 覆盖的旧ID软删除 + LevelDB批量写入
+                with self.leveldb.write_batch(sync=False) as wb:
+                    for row, key in enumerate(keys):
+                        if key in old_ids:
+                            self._mark_deleted(old_ids[key])
+                            self.id_key_map.pop(old_ids[key], None)
+                            wb.delete(self._rev_key(old_ids[key]))
+                        new_hnsw_id = start_id + row
+                        wb.put(key.encode("utf-8"), self._encode_value(new_hnsw_id, vecs[row], batch[key][1]))
+                        wb.put(self._rev_key(new_hnsw_id), key.encode("utf-8"))
+                        self.id_key_map[new_hnsw_id] = key
+                        self._cache_meta(new_hnsw_id, batch[key][1])
+
+                if not replay_mode:
+                    # 5. WAL（整批一次追加，锁内只追加保证顺序，锁外等待组提交落盘），索引随快照落盘
+                    try:
+                        wal_seq = self.wal_manager.write_logs([
+                            ("PUT", key, vecs[row], batch[key][1]) for row, key in enumerate(keys)
+                        ], wait=False)
+                    except Exception as e:
+                        logger.error(f"Persistence failed after PUT_BATCH size={len(keys)}: {e}")
+
+                    # 6. 周期性快照
+                    self._maybe_checkpoint(len(keys))
+
+                logger.info(f"PUT_BATCH success: size={len(keys)}, hnsw_id={start_id}~{self.next_hnsw_id - 1}")
+
+        if wal_seq is not None:
+            try:
+                self.wal_manager.sync(wal_seq)
+            except Exception as e:
+                logger.error(f"WAL fsync failed after PUT_BATCH: {e}")
+                return Response(success=False, message=f"WAL落盘失败：{e}")
+
+        if failed:
+            logger.error(f"PUT_BATCH部分失败：总数={len(data_list)}，失败={len(failed)}")
+            return Response(
+                success=False,
+                message=f"批量写入{len(data_list)}条，失败{len(failed)}条：{'; '.join(failed[:10])}",
+                failed_keys=failed_keys
+            )
+        return Response(success=True, message=f"批量写入{len(data_list)}条成功")
+
     def delete(self, key: str, replay_mode=False) -> Response:
-        with self.index_lock:
+        with self.index_lock.write():
             # 1. 查HNSW ID
             hnsw_id = self._get_hnsw_id_by_key(key)
             if hnsw_id == -1:
@@ -329,103 +693,276 @@ class VectorNodeHandler:
                 return Response(success=False, message=f"key={key}不存在")
             
             # 2. 标记删除 + 删除LevelDB数据
-            self.deleted_ids.add(hnsw_id)
-            with self.leveldb_lock:
-                self.leveldb.delete(key.encode('utf-8'))
+            self._mark_deleted(hnsw_id)
+            self.id_key_map.pop(hnsw_id, None)
+            with self.leveldb.write_batch(sync=False) as wb:
+                wb.delete(key.encode('utf-8'))
+                wb.delete(self._rev_key(hnsw_id))
             
-            # 3. 自动落盘 + WAL
+            # 3. 自动落盘 + WAL（锁外等待组提交落盘）
+            wal_seq = None
             if not replay_mode:
-                self._save_deleted_ids()
-                self.wal_manager.write_log("DELETE", key)
+                wal_seq = self.wal_manager.write_logs([("DELETE", key, None, None)], wait=False)
+                self._maybe_checkpoint()
+        if wal_seq is not None:
+            self.wal_manager.sync(wal_seq)
         
         logger.info(f"DELETE key={key}成功，标记HNSW ID={hnsw_id}为删除")
         return Response(success=True, message=f"key={key}删除成功")
 
+    def delete_batch(self, keys: list, replay_mode=False) -> Response:
+        """
+        批量删除向量：一次加锁、LevelDB批量删除、WAL一次追加
+        :param keys: 待删除的key列表（不存在的key跳过）
+        :param replay_mode: WAL重放时为True，不再写WAL、不触发快照
+        :return: message中给出实际删除条数
+        """
+        deleted_keys = []
+        wal_seq = None
+        with self.index_lock.write():
+            with self.leveldb.write_batch(sync=False) as wb:
+                for key in keys:
+                    vec_data = self.leveldb.get(key.encode('utf-8'))
+                    if not vec_data:
+                        continue
+                    hnsw_id = self._decode_hnsw_id(vec_data)
+                    self._mark_deleted(hnsw_id)
+                    self.id_key_map.pop(hnsw_id, None)
+                    wb.delete(key.encode('utf-8'))
+                    wb.delete(self._rev_key(hnsw_id))
+                    deleted_keys.append(key)
+
+            if deleted_keys and not replay_mode:
+                wal_seq = self.wal_manager.write_logs([("DELETE", key, None, None) for key in deleted_keys], wait=False)
+                self._maybe_checkpoint(len(deleted_keys))
+        if wal_seq is not None:
+            self.wal_manager.sync(wal_seq)
+
+        logger.info(f"DELETE_BATCH完成：请求{len(keys)}条，删除{len(deleted_keys)}条")
+        return Response(success=True, message=f"批量删除{len(deleted_keys)}条（请求{len(keys)}条）")
+
+    def _query_scratch(self, query_vector):
+        """把查询向量原地填入当前线程的(1, dim)缓冲区，维度不符时返回None"""
+        if query_vector is None or len(query_vector) != self.vector_dim:
+            return None
+        buf = getattr(self._tls, "query_vec", None)
+        if buf is None:
+            buf = self._tls.query_vec = np.empty((1, self.vector_dim), dtype=np.float32)
+        buf[0] = query_vector
+        return buf
+
+    @contextmanager
+    def _search_lock(self, ef: int):
+        """
+        检索加锁：ef是索引上的全局参数，索引平时保持默认ef（HNSW_EF_SEARCH），
+        默认ef的检索持有读锁并发执行；其它ef的检索持有写锁独占，设置ef→检索→恢复默认
+        """
+        if ef == HNSW_EF_SEARCH:
+            with self.index_lock.read():
+                yield
+            return
+        with self.index_lock.write():
+            self.hnsw_index.set_ef(ef)
+            try:
+                yield
+            finally:
+                self.hnsw_index.set_ef(HNSW_EF_SEARCH)
+
     def search(self, req: SearchRequest) -> Response:
-        query_vec = np.array(req.query_vector, dtype=np.float32).reshape(1, -1)
+        query_vec = self._query_scratch(req.query_vector)
+        if query_vec is None:
+            return Response(
+                success=False,
+                message=f"query vector dim mismatch: expect {self.vector_dim}, got {len(req.query_vector or [])}"
+            )
+        if self.normalize:
+            normalize_matrix(query_vec)
         top_k = req.top_k if req.top_k > 0 else 5
         threshold = req.threshold
+        include_vectors = req.include_vectors is not False  # 协调节点广播时只要key/分数/元数据
+        # 元数据过滤条件只解析一次：无过滤时不做任何比较
+        filter_items = tuple(req.filter.items()) if req.filter else None
+        # ef必须 >= k（按top_k估算，加锁前即可确定用读锁还是写锁）
+        ef = max(req.ef_search or HNSW_EF_SEARCH, top_k * 2)
 
-        with self.index_lock:
-            current_count = self.hnsw_index.get_current_count()
+        with self._search_lock(ef):
+            # 已标记删除的元素不会返回：可返回的元素数为有效ID数（反向映射大小）
+            live_count = len(self.id_key_map)
 
             # ====== 核心修复 1：元素不足，直接返回 ======
-            if current_count == 0:
+            if live_count == 0:
                 return Response(success=True, search_result=SearchResult(keys=[], scores=[], vectors=[]))
 
-            # k 不能超过 current_count
-            k = min(top_k, current_count)
-
-            # ====== 核心修复 2：ef 必须 >= k ======
-            ef = max(50, k * 2)
-            self.hnsw_index.set_ef(ef)
+            # k 不能超过有效元素数
+            k = min(top_k, live_count)
 
             try:
-                indices, distances = self.hnsw_index.knn_query(query_vec, k=k*2)
+                indices, distances = self.hnsw_index.knn_query(query_vec, k=min(k * 2, live_count))
                 logger.info("indices, distances:", indices, distances)
             except RuntimeError as e:
                 # ====== 核心修复 3：一旦异常，索引视为不可用 ======
                 logger.error(f"HNSW knn_query failed: {e}")
                 return Response(success=False, message="HNSW index corrupted, search aborted")
 
-            keys = []
-            vectors = []
-            scores = []
-
-            for i in range(len(indices[0])):
-                hnsw_id = int(indices[0][i])
+            return Response(
+                success=True,
+                search_result=self._collect_results(indices[0], distances[0], top_k, filter_items, include_vectors)
+            )
 
-                if hnsw_id in self.deleted_ids:
-                    logger.info("跳过已删除ID:", hnsw_id)
-                    continue
+    def batch_search(self, reqs: list) -> Response:
+        """
+        批量检索：全部查询向量堆叠为(B, dim)矩阵，一次knn_query（hnswlib按CPU核数并行检索各行），
+        过滤条件/top_k/include_vectors按各请求分别处理
+        :param reqs: SearchRequest列表
+        :return: search_results与reqs一一对应
+        """
+        if not reqs:
+            return Response(success=True, search_results=[])
+        try:
+            queries = list_to_matrix([req.query_vector for req in reqs])
+        except ValueError as e:
+            return Response(success=False, message=f"query vector dim mismatch: {e}")
+        if self.normalize:
+            normalize_matrix(queries)
+        top_ks = [req.top_k if req.top_k > 0 else 5 for req in reqs]
+        # 整批共用一次knn_query：k与ef取各请求中的最大值，结果再按各自top_k截断
+        ef = max(max(req.ef_search or HNSW_EF_SEARCH for req in reqs), max(top_ks) * 2)
+
+        with self._search_lock(ef):
+            live_count = len(self.id_key_map)
+            if live_count == 0:
+                return Response(success=True, search_results=[
+                    SearchResult(keys=[], scores=[], vectors=[]) for _ in reqs
+                ])
+
+            k = min(max(top_ks), live_count)
 
-                key = self._get_key_by_hnsw_id(hnsw_id)
-                if not key:
-                    logger.warning("HNSW ID无对应Key，跳过:", hnsw_id)
-                    continue
+            try:
+                indices, distances = self.hnsw_index.knn_query(
+                    queries, k=min(k * 2, live_count), num_threads=os.cpu_count() or 1
+                )
+            except RuntimeError as e:
+                logger.error(f"HNSW batch knn_query failed: {e}")
+                return Response(success=False, message="HNSW index corrupted, search aborted")
 
+            results = [
+                self._collect_results(
+                    indices[row], distances[row], top_k,
+                    tuple(req.filter.items()) if req.filter else None,
+                    req.include_vectors is not False
+                )
+                for row, (req, top_k) in enumerate(zip(reqs, top_ks))
+            ]
+        logger.info(f"BATCH_SEARCH完成：查询数={len(reqs)}，k={k}")
+        return Response(success=True, search_results=results)
+
+    def _collect_results(self, indices, distances, top_k: int, filter_items, include_vectors: bool) -> SearchResult:
+        """
+        单个查询的候选（knn_query结果的一行）组装为检索结果（调用方持有index_lock读锁）
+        :param indices: 候选hnsw_id（按距离升序）
+        :param distances: 对应距离
+        :param top_k: 返回条数上限
+        :param filter_items: 元数据过滤条件（key, value）元组，None表示不过滤
+        :param include_vectors: 结果是否携带向量
+        :return: SearchResult
+        """
+        keys = []
+        vectors = []
+        scores = []
+        hit_ids = []
+
+        # 整行一次转为Python int/float，循环内不再逐个装箱numpy标量
+        ids = indices.tolist()
+        # 反向映射只含有效ID（删除/覆盖时已移除）：map一次完成全部候选的key查找与有效性校验，
+        # 已删除ID得到None，循环只处理有效候选
+        candidates = [
+            (hnsw_id, key, score)
+            for hnsw_id, key, score in zip(ids, map(self.id_key_map.get, ids), distances.tolist())
+            if key is not None
+        ]
+        for hnsw_id, key, score in candidates:
+            # 先查元数据缓存，未命中才读LevelDB并解码
+            metadata = self._cached_meta(hnsw_id)
+            if metadata is None:
                 vec_data = self.leveldb.get(key.encode("utf-8"))
                 if not vec_data:
                     logger.warning("LevelDB无对应数据，跳过Key:", key)
                     continue
+                metadata = self._decode_value(vec_data)["metadata"] or {}
+                self._cache_meta(hnsw_id, metadata)
 
-                vec_dict = json.loads(vec_data)
-                score = float(distances[0][i])
-                # if score > threshold:
-                #     logger.info("跳过低于阈值的结果:", score)
-                #     continue
+            if filter_items is not None:
+                if any(metadata.get(fk) != fv for fk, fv in filter_items):
+                    continue
+            # if score > threshold:
+            #     logger.info("跳过低于阈值的结果:", score)
+            #     continue
 
-                keys.append(key)
-                vectors.append(VectorData(key=key, vector=vec_dict["vector"], metadata=vec_dict["metadata"]))
-                scores.append(score)
+            keys.append(key)
+            vectors.append(VectorData(key=key, metadata=metadata))
+            scores.append(score)
+            hit_ids.append(hnsw_id)
 
-                if len(keys) >= top_k:
-                    break
+            if len(keys) >= top_k:
+                break
 
-            return Response(
-                success=True,
-                search_result=SearchResult(keys=keys, scores=scores, vectors=vectors)
-            )
+        # 命中结果的向量从索引中一次批量取出（一次C调用，而非逐条取值），
+        # 以float32字节流返回，不展开为Python float列表
+        if include_vectors and hit_ids:
+            self._attach_packed(vectors, self.hnsw_index.get_items(hit_ids))
 
+        return SearchResult(keys=keys, scores=scores, vectors=vectors)
 
     def get(self, key: str) -> Response:
-        with self.leveldb_lock:
+        # 读锁：保存快照时LevelDB会被短暂关闭重开
+        with self.index_lock.read():
             vec_data = self.leveldb.get(key.encode('utf-8'))
-            if not vec_data:
-                return Response(success=False, message=f"key={key}不存在")
-            
-            # 解析向量和元数据
-            vec_dict = json.loads(vec_data)
-            # 检查是否被删除
-            if vec_dict['hnsw_id'] in self.deleted_ids:
-                return Response(success=False, message=f"key={key}已被删除")
-            
-            data = VectorData(
-                key=key,
-                vector=vec_dict['vector'],
-                metadata=vec_dict['metadata']
-            )
-            return Response(success=True, vector_data=data)
+        if not vec_data:
+            return Response(success=False, message=f"key={key}不存在")
+        
+        # 解析向量和元数据
+        vec_dict = self._decode_value(vec_data)
+        # 检查是否被删除
+        if vec_dict['hnsw_id'] in self.deleted_ids:
+            return Response(success=False, message=f"key={key}已被删除")
+        
+        data = VectorData(
+            key=key,
+            vector=np.asarray(vec_dict['vector'], dtype=np.float32).tolist(),
+            metadata=vec_dict['metadata']
+        )
+        return Response(success=True, vector_data=data)
+
+    @staticmethod
+    def _attach_packed(vectors: list, rows):
+        """(N, dim)向量矩阵逐行以float32字节流填入VectorData.packed_vector"""
+        rows = np.ascontiguousarray(rows, dtype=np.float32)
+        for vector_data, row in zip(vectors, rows):
+            vector_data.packed_vector = row.tobytes()
+            vector_data.packed_dtype = "float32"
+
+    def get_batch(self, keys: list) -> Response:
+        """批量获取向量（不存在或已删除的key跳过），结果放在search_result.keys/vectors中"""
+        found_keys = []
+        vectors = []
+        hnsw_ids = []
+        # 读锁内完成：取出的hnsw_id在get_items前不会被写入/重建改变
+        with self.index_lock.read():
+            for key in keys:
+                vec_data = self.leveldb.get(key.encode('utf-8'))
+                if not vec_data:
+                    continue
+                vec_dict = self._decode_value(vec_data)
+                if vec_dict['hnsw_id'] in self.deleted_ids:
+                    continue
+                found_keys.append(key)
+                hnsw_ids.append(vec_dict['hnsw_id'])
+                vectors.append(VectorData(key=key, metadata=vec_dict['metadata']))
+            # 向量从索引中一次批量取出
+            rows = self.hnsw_index.get_items(hnsw_ids) if hnsw_ids else None
+        if rows is not None:
+            self._attach_packed(vectors, rows)
+        return Response(success=True, search_result=SearchResult(keys=found_keys, vectors=vectors))
 
 # ========== 信号处理 ==========
 def _signal_handler(signum, frame):
@@ -1,9 +1,9 @@
 import sys
 from loguru import logger
-from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket
 from thrift.server import TServer
 from Config import DATANODE_DEFAULT_PORT_START
+from src.utils import create_server_factories
 from src.vector_db import VectorNodeService  # 必须导入生成的Service类
 from src.vector_db.VectorNodeService import Iface  # 导入接口
 from src.datanode.handler import VectorNodeHandler  # 导入更新后的handler
@@ -19,12 +19,12 @@ def start_datanode(node_id: str, port: int = None):
     # 初始化Thrift服务器（原有逻辑不变）
     processor = VectorNodeService.Processor(handler)
     transport = TSocket.TServerSocket(port=port)
-    tfactory = TTransport.TBufferedTransportFactory()
-    pfactory = TBinaryProtocol.TBinaryProtocolFactory()
+    tfactory, pfactory = create_server_factories()  # 分帧传输 + Compact协议（需与客户端一致）
 
-    server = TServer.TThreadPoolServer(
+    # 每个连接一个线程：协调节点连接池（含预热连接）长期占用连接，固定线程池会限制并发甚至阻塞新连接
+    server = TServer.TThreadedServer(
         processor, transport, tfactory, pfactory,
-        worker_count=5  # 线程池大小
+        daemon=True
     )
 
     logger.info(f"数据节点{node_id}启动成功，监听端口：{port}")
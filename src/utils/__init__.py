@@ -1,11 +1,20 @@
 from .zk_manager import get_zk_manager, ZKManager
 from .wal_manager import WALManager
 from .shared_utils import get_shard_id, assign_shards_to_nodes
-from .vector_utils import vector_to_list, list_to_vector, normalize_vector
+from .rpc_utils import create_rpc_client, create_server_factories, is_connection_alive
+from .put_batcher import ShardBatcher
+from .rw_lock import RWLock
+from .vector_utils import (
+    vector_to_list, list_to_vector, normalize_vector, list_to_matrix, normalize_matrix,
+    pack_vector, unpack_vector, data_to_vector, DEFAULT_PACKED_DTYPE
+)
 
 __all__ = [
     "get_zk_manager", "ZKManager",
     "WALManager",
     "get_shard_id", "assign_shards_to_nodes",
-    "vector_to_list", "list_to_vector", "normalize_vector"
+    "create_rpc_client", "create_server_factories", "is_connection_alive",
+    "ShardBatcher", "RWLock",
+    "vector_to_list", "list_to_vector", "normalize_vector", "list_to_matrix", "normalize_matrix",
+    "pack_vector", "unpack_vector", "data_to_vector", "DEFAULT_PACKED_DTYPE"
 ]
\ No newline at end of file
@@ -0,0 +1,65 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from Config import PUT_COALESCE_MAX_BATCH, PUT_COALESCE_MAX_WAIT_MS
+from src.vector_db.ttypes import VectorData, Response
+
+
+class ShardBatcher:
+    """
+    单条PUT合并器：并发到达的单条写入排队，凑满max_batch或首条等待超过max_wait后
+    整批调用一次send_fn，每条写入通过Future拿到结果
+    （协调节点每个主节点一个，发送put_batch RPC；数据节点一个，直接调用本地put_batch）
+    """
+    def __init__(self, node_id: str, send_fn, max_batch: int = PUT_COALESCE_MAX_BATCH,
+                 max_wait_ms: float = PUT_COALESCE_MAX_WAIT_MS):
+        """
+        :param node_id: 目标节点ID（用于send_fn与线程名）
+        :param send_fn: 发送函数 send_fn(node_id, data_list) -> Response
+        """
+        self.node_id = node_id
+        self.send_fn = send_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = deque()  # [(VectorData, Future)]
+        self.cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True, name=f"put-batcher-{node_id}")
+        self._worker.start()
+
+    def submit(self, data: VectorData) -> Future:
+        """提交一条写入，返回的Future在所在批次发送完成后得到Response"""
+        future = Future()
+        with self.cond:
+            self.queue.append((data, future))
+            if len(self.queue) == 1 or len(self.queue) >= self.max_batch:
+                self.cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue:
+                    self.cond.wait()
+                # 首条到达后最多再等max_wait，期间凑满一批立即发送
+                deadline = time.monotonic() + self.max_wait
+                while len(self.queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch = [self.queue.popleft() for _ in range(min(len(self.queue), self.max_batch))]
+
+            try:
+                resp = self.send_fn(self.node_id, [data for data, _ in batch])
+            except Exception as e:
+                resp = Response(success=False, message=str(e))
+            # 部分失败时按failed_keys逐条返回；未给出failed_keys（整批失败）时各条共享批次结果
+            failed_keys = set(resp.failed_keys) if not resp.success and resp.failed_keys is not None else None
+            for data, future in batch:
+                if resp.success or (failed_keys is not None and data.key not in failed_keys):
+                    future.set_result(Response(success=True, message=f"key={data.key} 写入成功"))
+                elif failed_keys is not None:
+                    future.set_result(Response(success=False, message=f"key={data.key} 写入失败：{resp.message}", failed_keys=[data.key]))
+                else:
+                    future.set_result(resp)
@@ -0,0 +1,44 @@
+import select
+from thrift.transport import TSocket, TTransport
+from thrift.protocol import TCompactProtocol
+
+def create_rpc_client(client_cls, address: str, timeout: int = None) -> tuple:
+    """
+    新建Thrift客户端（未打开连接）：TFramedTransport + TCompactProtocol，开启TCP keepalive
+    客户端与服务端的传输层/协议必须一致，统一在此处构造
+    :param client_cls: Thrift生成的Client类
+    :param address: 服务地址（host:port）
+    :param timeout: 读写超时（ms），None表示不超时
+    :return: (client, transport)
+    """
+    host, port = address.split(":")
+    tsocket = TSocket.TSocket(host, int(port), socket_keepalive=True)
+    if timeout:
+        tsocket.setTimeout(timeout)
+    transport = TTransport.TFramedTransport(tsocket)
+    transport.tsocket = tsocket  # 保留底层socket引用，供连接探活使用
+    protocol = TCompactProtocol.TCompactProtocolAccelerated(transport)
+    return client_cls(protocol), transport
+
+def create_server_factories() -> tuple:
+    """
+    服务端传输层/协议工厂（与create_rpc_client对应）
+    :return: (transport_factory, protocol_factory)
+    """
+    return TTransport.TFramedTransportFactory(), TCompactProtocol.TCompactProtocolAcceleratedFactory()
+
+def is_connection_alive(transport) -> bool:
+    """
+    非阻塞探测空闲连接是否可用（零超时select，无需一次RPC往返）：
+    空闲连接上不应有可读数据，可读意味着对端已关闭（EOF）或残留未读数据（上次调用状态不一致）
+    :param transport: create_rpc_client返回的transport
+    :return: 是否可继续使用
+    """
+    handle = getattr(getattr(transport, "tsocket", None), "handle", None)
+    if handle is None:
+        return False
+    try:
+        readable, _, _ = select.select([handle], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
@@ -0,0 +1,58 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    读写锁：多个读者可同时持有，写者独占；写者等待期间不再放入新读者（避免写者饥饿）
+    写锁可由同一线程重入（写路径内部会再次加锁，如写入触发重建/快照）；
+    持有写锁的线程再申请读锁视为重入写锁；读锁不可重入
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0  # 当前持有读锁的线程数
+        self._writers_waiting = 0
+        self._writer = None  # 持有写锁的线程ident
+        self._write_depth = 0
+
+    @contextmanager
+    def read(self):
+        """读锁上下文"""
+        if self._writer == threading.get_ident():
+            with self.write():
+                yield
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """写锁上下文（同一线程可重入）"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+            else:
+                self._writers_waiting += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._writers_waiting -= 1
+                self._writer = me
+                self._write_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
@@ -1,19 +1,49 @@
 import hashlib
-from Config import SHARD_COUNT
+from Config import SHARD_COUNT, SHARD_HASH
 
-def get_shard_id(key: str, shard_count: int = SHARD_COUNT) -> int:
-    """哈希分片：key→分片ID（复用计算逻辑）"""
-    md5 = hashlib.md5(key.encode()).hexdigest()
-    return int(md5, 16) % shard_count
+def _md5_hash(key_bytes: bytes) -> int:
+    """直接取摘要字节转整数，结果与十六进制解析一致"""
+    return int.from_bytes(hashlib.md5(key_bytes).digest(), "big")
+
+def _load_shard_hash():
+    """按SHARD_HASH选择分片哈希函数（模块加载时确定一次）"""
+    if SHARD_HASH == "md5":
+        return _md5_hash
+    if SHARD_HASH == "xxh3":
+        # 非加密哈希，短字符串上远快于md5；未安装时直接报错，避免不同进程按不同算法路由
+        import xxhash
+        return xxhash.xxh3_64_intdigest
+    raise ValueError(f"不支持的分片哈希算法：{SHARD_HASH}")
+
+_shard_hash = _load_shard_hash()
+
+def get_shard_id(key, shard_count: int = SHARD_COUNT) -> int:
+    """
+    哈希分片：key→分片ID
+    :param key: str或已编码的bytes（调用方可预先编码一次，多次路由时不再重复编码）
+    """
+    if isinstance(key, str):
+        key = key.encode()
+    return _shard_hash(key) % shard_count
+
+def _hrw_score(node_id: str, shard_id: int) -> int:
+    """Rendezvous哈希权重：跨进程稳定（不依赖随机化的内置hash）"""
+    digest = hashlib.blake2b(f"{node_id}|{shard_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
 
 def assign_shards_to_nodes(nodes: list, shard_count: int = SHARD_COUNT, replica_count: int = 2) -> dict:
-    """分配分片到节点（轮询策略）"""
+    """
+    分配分片到节点（Rendezvous/HRW哈希）
+    每个分片按权重对节点排序：第一名为主节点，其后为副本。
+    结果与节点列表顺序无关，节点增减时只有约1/N的分片迁移。
+    """
     shard_mapping = {}
     if not nodes:
         return shard_mapping
     for shard_id in range(shard_count):
-        master_node = nodes[shard_id % len(nodes)]
-        slave_nodes = [nodes[(shard_id + i) % len(nodes)] for i in range(1, replica_count + 1)]
+        ranked = sorted(nodes, key=lambda n: _hrw_score(n, shard_id), reverse=True)
+        master_node = ranked[0]
+        slave_nodes = ranked[1:replica_count + 1]
         shard_mapping[shard_id] = {
             "master": master_node,
             "slaves": slave_nodes
@@ -1,6 +1,11 @@
 import numpy as np
 from Config import VECTOR_DIM
 
+# 紧凑编码：单位向量各维取值在[-1, 1]内，float16/int8的排序误差可忽略
+INT8_SCALE = 127.0
+# packed_vector未指定packed_dtype时的编码：与入库默认编码、数据节点返回的编码一致
+DEFAULT_PACKED_DTYPE = "float32"
+
 def vector_to_list(vec: np.ndarray) -> list:
     """numpy向量转列表"""
     return vec.tolist() if isinstance(vec, np.ndarray) else vec
@@ -13,5 +18,47 @@ def list_to_vector(lst: list) -> np.ndarray:
     return vec
 
 def normalize_vector(vec: np.ndarray) -> np.ndarray:
-    """向量归一化"""
-    return vec / np.linalg.norm(vec) if np.linalg.norm(vec) > 0 else vec
\ No newline at end of file
+    """向量归一化（范数只计算一次，float32下用点积代替linalg.norm）"""
+    vec = np.asarray(vec, dtype=np.float32)
+    norm = np.sqrt(np.dot(vec, vec))
+    return vec / norm if norm > 0 else vec
+
+def list_to_matrix(lst: list) -> np.ndarray:
+    """多个向量列表一次转为(B, dim)的float32矩阵（校验维度）"""
+    mat = np.array(lst, dtype=np.float32)
+    if mat.ndim != 2 or mat.shape[1] != VECTOR_DIM:
+        raise ValueError(f"向量矩阵形状错误：期望(B, {VECTOR_DIM})，实际{mat.shape}")
+    return mat
+
+def normalize_matrix(mat: np.ndarray) -> np.ndarray:
+    """按行原地归一化(B, dim)矩阵（einsum一次算出所有行的平方范数，零向量保持不变）"""
+    norms = np.sqrt(np.einsum("ij,ij->i", mat, mat))[:, None]
+    np.divide(mat, norms, out=mat, where=norms > 0)
+    return mat
+
+def pack_vector(vec, dtype: str = DEFAULT_PACKED_DTYPE) -> bytes:
+    """向量压缩为字节流（用于VectorData.packed_vector）"""
+    vec = np.asarray(vec, dtype=np.float32)
+    if dtype == "float16":
+        return vec.astype(np.float16).tobytes()
+    if dtype == "int8":
+        return np.clip(np.round(vec * INT8_SCALE), -127, 127).astype(np.int8).tobytes()
+    if dtype == "float32":
+        return vec.tobytes()
+    raise ValueError(f"不支持的向量编码：{dtype}")
+
+def unpack_vector(packed: bytes, dtype: str = DEFAULT_PACKED_DTYPE) -> np.ndarray:
+    """字节流还原为float32向量"""
+    if dtype == "float16":
+        return np.frombuffer(packed, dtype=np.float16).astype(np.float32)
+    if dtype == "int8":
+        return np.frombuffer(packed, dtype=np.int8).astype(np.float32) / INT8_SCALE
+    if dtype == "float32":
+        return np.frombuffer(packed, dtype=np.float32)
+    raise ValueError(f"不支持的向量编码：{dtype}")
+
+def data_to_vector(data) -> np.ndarray:
+    """从VectorData取float32向量（packed_vector优先于vector）"""
+    if data.packed_vector:
+        return unpack_vector(data.packed_vector, data.packed_dtype or DEFAULT_PACKED_DTYPE)
+    return np.array(data.vector, dtype=np.float32)
@@ -1,10 +1,40 @@
 import os
 import json
+import mmap
 import time
+import struct
 import shutil
+import threading
+import zlib
+from operator import itemgetter
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
-from typing import Dict, List
+from typing import Dict, List, Iterator
 from src.vector_db.ttypes import VectorData
+from Config import WAL_REPLAY_BATCH_SIZE, WAL_SEGMENT_COMPRESSION
+
+# 重放时的JSON解析：安装了orjson时使用（直接解析bytes，解析错误同样是json.JSONDecodeError的子类）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 二进制WAL记录：头部<magic:uint8, op:uint8, timestamp:int64, key_len, vector_len, meta_len:uint32>
+# + key + float32向量 + 元数据JSON + CRC32(头部+内容)，重放时按magic与CRC识别写到一半的记录
+# 新日志文件为wal_<ts>.wbin，轮转后可压缩为wal_<ts>.wbin.zst；旧版本的wal_<ts>.wal（无magic/CRC）与wal_<ts>.log（每行一个JSON）只读，重放时都能读取
+WAL_MAGIC = 0x9E
+WAL_RECORD_HEADER = struct.Struct("<BBqIII")
+WAL_RECORD_CRC = struct.Struct("<I")
+WAL_RECORD_HEADER_V1 = struct.Struct("<BqIII")
+WAL_OP_CODES = {"PUT": 1, "DELETE": 2}
+WAL_OP_NAMES = {code: name for name, code in WAL_OP_CODES.items()}
+WAL_SUFFIXES = (".wbin", ".wbin.zst", ".wal", ".log")
+# 编码缓冲区的常驻大小：各线程复用同一块缓冲区编码整批记录，超大批次临时扩容后收回到该大小
+WAL_ENCODE_BUFFER_SIZE = 128 * 1024
+# 落盘只需数据本身（及文件大小），不必同步mtime等元数据；无fdatasync的平台退回fsync
+_fdatasync = getattr(os, "fdatasync", os.fsync)
 
 class WALManager:
     def __init__(self, node_id):
@@ -22,23 +52,50 @@ class WALManager:
         self.max_log_size = 10 * 1024 * 1024  # 单个日志文件最大10MB
         self.max_log_age = 7 * 24 * 3600      # 日志保留7天
         
-        # 运行时状态
-        self.current_log_file = self._get_current_log_file()
+        # 运行时状态：当前日志文件的描述符常驻打开（O_APPEND），每批记录一次os.write
+        self.lock = threading.Lock()
+        self.current_log_file = None
+        self._fd = None
+        self._log_size = 0
+        # 组提交：追加与fsync分离，并发等待的写入由一次fsync统一落盘
+        self.sync_cond = threading.Condition()
+        self._written_seq = 0  # 已追加到文件的批次序号（self.lock内递增）
+        self._synced_seq = 0   # 已fsync的批次序号
+        self._syncing = False  # 是否有线程正在执行fsync
+        self._tls = threading.local()  # 各写入线程的编码缓冲区（编码在self.lock外并发进行）
+        self._open_log_file(self._get_current_log_file())
         self.replayed = False
         self.checkpoint_ts = self._load_checkpoint_ts()
 
+        # 过期日志由后台线程定期清理，不在写入路径上列目录
+        self._closed = threading.Event()
+        self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+        self.cleanup_thread.start()
+
     # ========== 辅助方法：日志文件管理 ==========
+    @staticmethod
+    def _log_file_ts(name: str) -> int:
+        """日志文件名中的起始时间戳"""
+        return int(name.split("_")[1].split(".")[0])
+
+    def _list_log_files(self) -> List[str]:
+        """按起始时间排序的全部日志文件名（含旧版本JSON格式的.log；压缩完成但原文件未删除时只取原文件）"""
+        names = {f for f in os.listdir(self.wal_data_dir) if f.startswith("wal_") and f.endswith(WAL_SUFFIXES)}
+        return sorted(
+            (f for f in names if not (f.endswith(".zst") and f[:-len(".zst")] in names)),
+            key=self._log_file_ts
+        )
+
+    def _new_log_file(self) -> str:
+        return os.path.join(self.wal_data_dir, f"wal_{int(time.time() * 1000)}.wbin")
+
     def _get_current_log_file(self) -> str:
-        """获取当前写入的日志文件（按大小滚动）"""
-        log_files = sorted([
-            f for f in os.listdir(self.wal_data_dir) 
-            if f.startswith("wal_") and f.endswith(".log")
-        ])
+        """获取当前写入的日志文件（按大小滚动；旧格式的.wal/.log只读不追加）"""
+        log_files = self._list_log_files()
         
-        # 无日志文件时新建
-        if not log_files:
-            new_file = os.path.join(self.wal_data_dir, f"wal_{int(time.time() * 1000)}.log")
-            return new_file
+        # 无日志文件或最后一个为旧格式时新建
+        if not log_files or not log_files[-1].endswith(".wbin"):
+            return self._new_log_file()
         
         # 检查最后一个文件是否超过大小阈值
         last_file = os.path.join(self.wal_data_dir, log_files[-1])
@@ -46,8 +103,55 @@ class WALManager:
             return last_file
         else:
             # 新建日志文件
-            new_file = os.path.join(self.wal_data_dir, f"wal_{int(time.time() * 1000)}.log")
-            return new_file
+            return self._new_log_file()
+
+    def _open_log_file(self, path: str):
+        """切换到指定日志文件（O_APPEND描述符，文件大小在内存中累计，不再每次stat）"""
+        if self._fd is not None:
+            # 旧文件中已追加未落盘的记录在关闭前落盘
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._mark_synced(self._written_seq)
+        if path.endswith(".wbin") and os.path.exists(path):
+            self._truncate_torn_tail(path)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._log_size = os.lseek(self._fd, 0, os.SEEK_END)
+        self.current_log_file = path
+
+    def _truncate_torn_tail(self, path: str):
+        """
+        截掉待追加日志段末尾写到一半/损坏的记录（崩溃残留），
+        否则新记录追加在损坏记录之后，重放在损坏处停止时会连同新记录一起丢弃
+        """
+        with open(path, "rb") as f:
+            buf = f.read()
+        valid_end = 0
+        for valid_end, _ in self._scan_records(buf):
+            pass
+        if valid_end < len(buf):
+            os.truncate(path, valid_end)
+            logger.warning(f"截断WAL末尾不完整/损坏的记录：{path}，{len(buf) - valid_end}字节")
+
+    def _append(self, data):
+        """一次write追加整批记录（普通文件通常一次写完，部分写入时继续写剩余部分）"""
+        with memoryview(data) as view:
+            written = 0
+            while written < len(view):
+                written += os.write(self._fd, view[written:])
+
+    def flush(self):
+        """把已追加的全部记录落盘（提交边界/关闭前调用）"""
+        self.sync(self._written_seq)
+
+    def close(self):
+        """落盘并关闭当前日志文件"""
+        self._closed.set()
+        with self.lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+                self._mark_synced(self._written_seq)
 
     def _load_checkpoint_ts(self) -> int:
         """加载上次重放的位点（时间戳）"""
@@ -67,50 +171,319 @@ class WALManager:
     def _clean_expired_logs(self):
         """清理过期/过大的日志文件"""
         current_ts = int(time.time())
-        log_files = [f for f in os.listdir(self.wal_data_dir) if f.startswith("wal_") and f.endswith(".log")]
-        for log_file in log_files:
+        for log_file in self._list_log_files():
             file_path = os.path.join(self.wal_data_dir, log_file)
+            if file_path == self.current_log_file:
+                continue
             # 按时间清理（日志文件名中的时间戳）
-            file_ts = int(log_file.split("_")[1].split(".")[0]) / 1000
+            file_ts = self._log_file_ts(log_file) / 1000
             if current_ts - file_ts > self.max_log_age:
                 os.remove(file_path)
                 logger.info(f"清理过期WAL日志：{log_file}")
 
+    def _cleanup_loop(self):
+        """定期清理过期日志（间隔为保留时长的1/10）"""
+        while not self._closed.wait(self.max_log_age / 10):
+            try:
+                self._clean_expired_logs()
+            except Exception as e:
+                logger.error(f"清理过期WAL日志失败：{e}")
+
     # ========== 核心方法：写入WAL日志 ==========
-    def write_log(self, op_type: str, key: str, vector=None, metadata=None, timestamp=None):
+    def write_log(self, op_type: str, key: str, vector=None, metadata=None, timestamp=None, wait: bool = True) -> int:
         """
-        写入WAL日志（原子写入+按大小滚动）
+        写入WAL日志（单条，按大小滚动）
         :param op_type: PUT/DELETE
         :param key: 向量Key
-        :param vector: 向量列表（PUT时传）
+        :param vector: 向量（列表或numpy数组，PUT时传）
         :param metadata: 元数据字典（PUT时传）
         :param timestamp: 操作时间戳（默认当前时间）
+        :param wait: 是否等待落盘后返回（为False时由调用方稍后sync，或随其它写入的组提交落盘）
+        :return: 本批次序号
+        """
+        return self.write_logs([(op_type, key, vector, metadata)], timestamp, wait=wait)
+
+    def write_logs(self, entries: List[tuple], timestamp=None, wait: bool = True) -> int:
         """
-        # 构造日志条目
+        批量写入WAL日志：所有条目拼成一次追加写（批量写入时只产生一次写系统调用）
+        :param entries: [(op_type, key, vector, metadata)]
+        :param timestamp: 操作时间戳（默认当前时间，同一批共用）
+        :param wait: 是否等待落盘后返回；为False时调用方在释放自己的锁后再调用sync(返回值)
+        :return: 本批次序号
+        """
+        if not entries:
+            return self._written_seq
         log_ts = timestamp or int(time.time() * 1000)
-        log_entry = {
-            "op_type": op_type,
-            "key": key,
-            "vector": vector,
-            "metadata": metadata,
-            "timestamp": log_ts,
-            "node_id": self.node_id
+        buf = getattr(self._tls, "buf", None)
+        if buf is None:
+            buf = self._tls.buf = bytearray(WAL_ENCODE_BUFFER_SIZE)
+        size = 0
+        for entry in entries:
+            buf, size = self._encode_record(buf, size, log_ts, *entry)
+        with self.lock:
+            # 追加到常驻打开的当前日志文件（崩溃时最多留下不完整的末尾记录，重新打开时截断、重放时丢弃）
+            with memoryview(buf) as view:
+                self._append(view[:size])
+            self._log_size += size
+            self._written_seq += 1
+            seq = self._written_seq
+
+            # 超过大小阈值时滚动到新日志文件，已写满的段在后台压缩
+            if self._log_size >= self.max_log_size:
+                rotated = self.current_log_file
+                self._open_log_file(self._new_log_file())
+                if WAL_SEGMENT_COMPRESSION == "zstd":
+                    threading.Thread(target=self._compress_segment, args=(rotated,), daemon=True).start()
+        # 超大批次扩容的缓冲区不常驻，下次按常驻大小重新分配
+        self._tls.buf = buf if len(buf) <= WAL_ENCODE_BUFFER_SIZE else None
+
+        if wait:
+            self.sync(seq)
+        return seq
+
+    def _mark_synced(self, seq: int):
+        with self.sync_cond:
+            if seq > self._synced_seq:
+                self._synced_seq = seq
+                self.sync_cond.notify_all()
+
+    def sync(self, seq: int):
+        """
+        等待序号不超过seq的批次落盘（组提交）：没有fsync在进行时由当前线程执行一次fdatasync，
+        覆盖此前所有已追加的批次；否则等待进行中的fsync完成后再判断
+        WAL是每次写入唯一的持久化点，写入请求在此返回后才算持久
+        """
+        with self.sync_cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    self.sync_cond.wait()
+                    continue
+                self._syncing = True
+                break
+            else:
+                return
+        try:
+            with self.lock:
+                target = self._written_seq
+                fd = os.dup(self._fd)
+            try:
+                _fdatasync(fd)
+            finally:
+                os.close(fd)
+            self._mark_synced(target)
+        finally:
+            with self.sync_cond:
+                self._syncing = False
+                self.sync_cond.notify_all()
+
+    @staticmethod
+    def _encode_record(buf: bytearray, pos: int, log_ts: int, op_type: str, key: str, vector=None, metadata=None) -> tuple:
+        """
+        把一条二进制WAL记录原地编码到buf[pos:]（向量直接拷贝float32字节，不转成JSON数字、不生成中间bytes；末尾附CRC32）
+        :return: (buf, 记录结束位置)；空间不足时buf按倍数扩容
+        """
+        key_b = key.encode("utf-8")
+        vec = np.ascontiguousarray(vector, dtype=np.float32) if vector is not None else None
+        vec_len = vec.nbytes if vec is not None else 0
+        meta_b = json.dumps(metadata, separators=(",", ":"), ensure_ascii=False).encode("utf-8") if metadata else b""
+        body = pos + WAL_RECORD_HEADER.size
+        crc_pos = body + len(key_b) + vec_len + len(meta_b)
+        end = crc_pos + WAL_RECORD_CRC.size
+        if end > len(buf):
+            buf.extend(bytes(max(end - len(buf), len(buf))))
+
+        WAL_RECORD_HEADER.pack_into(buf, pos, WAL_MAGIC, WAL_OP_CODES[op_type], log_ts, len(key_b), vec_len, len(meta_b))
+        buf[body:body + len(key_b)] = key_b
+        body += len(key_b)
+        if vec_len:
+            buf[body:body + vec_len] = memoryview(vec).cast("B")
+            body += vec_len
+        buf[body:crc_pos] = meta_b
+        with memoryview(buf) as view:
+            WAL_RECORD_CRC.pack_into(buf, crc_pos, zlib.crc32(view[pos:crc_pos]))
+        return buf, end
+
+    @staticmethod
+    def _decode_record(buf: bytes, op: int, log_ts: int, body: int, key_len: int, vec_len: int, meta_len: int) -> dict:
+        """
+        从记录内容解码出{op_type, key, vector, metadata_raw, timestamp}：向量为指向buf的float32视图，
+        元数据保留原始JSON字节，重放去重后只解析最终保留的记录（被覆盖的记录不做JSON解析）
+        """
+        key_end = body + key_len
+        vec_end = key_end + vec_len
+        return {
+            "op_type": WAL_OP_NAMES.get(op),
+            "key": buf[body:key_end].decode("utf-8"),
+            "vector": np.frombuffer(buf, dtype=np.float32, count=vec_len // 4, offset=key_end) if vec_len else None,
+            "metadata_raw": buf[vec_end:vec_end + meta_len] if meta_len else None,
+            "timestamp": log_ts
         }
-        
-        # 原子写入（临时文件+重命名，避免崩溃导致日志损坏）
-        temp_file = f"{self.current_log_file}.tmp"
-        with open(temp_file, "a", encoding="utf-8") as f:
-            # 每行一个JSON，便于逐行读取
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-        os.rename(temp_file, self.current_log_file)
-        
-        # 检查是否需要滚动日志文件
-        if os.path.getsize(self.current_log_file) >= self.max_log_size:
-            self.current_log_file = self._get_current_log_file()
-        
-        # 定期清理过期日志（每100次操作执行一次）
-        if log_ts % 100 == 0:
-            self._clean_expired_logs()
+
+    @classmethod
+    def _scan_records(cls, buf: bytes) -> Iterator[tuple]:
+        """
+        逐条校验并解码.wbin日志内容，返回(记录结束位置, 记录)；
+        遇到magic不符、长度越界或CRC不符的记录即停止（写到一半的末尾记录）
+        """
+        pos, end = 0, len(buf)
+        while pos + WAL_RECORD_HEADER.size <= end:
+            magic, op, log_ts, key_len, vec_len, meta_len = WAL_RECORD_HEADER.unpack_from(buf, pos)
+            body = pos + WAL_RECORD_HEADER.size
+            record_end = body + key_len + vec_len + meta_len
+            if magic != WAL_MAGIC or record_end + WAL_RECORD_CRC.size > end:
+                return
+            (crc,) = WAL_RECORD_CRC.unpack_from(buf, record_end)
+            if zlib.crc32(memoryview(buf)[pos:record_end]) != crc:
+                return
+            pos = record_end + WAL_RECORD_CRC.size
+            yield pos, cls._decode_record(buf, op, log_ts, body, key_len, vec_len, meta_len)
+
+    @staticmethod
+    def _compress_segment(path: str):
+        """把已轮转的日志段压缩为<path>.zst（先写临时文件，落盘后改名，再删除原文件）"""
+        import zstandard
+        tmp_path = path + ".zst.tmp"
+        try:
+            with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+                zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, path + ".zst")
+            os.remove(path)
+            logger.info(f"WAL日志段已压缩：{os.path.basename(path)}.zst")
+        except Exception as e:
+            logger.error(f"压缩WAL日志段失败：{path}，错误：{e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _read_segment(log_file: str):
+        """
+        读取二进制日志段的全部内容：未压缩的段只读mmap（按需换页，不整体读入内存），.zst段流式解压
+        mmap在最后一个引用（含指向它的向量视图）释放后自动解除映射
+        """
+        with open(log_file, "rb") as f:
+            if not log_file.endswith(".zst"):
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            import zstandard
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                return reader.read()
+
+    @staticmethod
+    def _entry_metadata(log_entry: dict):
+        """取日志条目的元数据（二进制记录此时才解析JSON）"""
+        raw = log_entry.get("metadata_raw")
+        return _json_loads(raw) if raw else log_entry.get("metadata")
+
+    def _iter_log_entries(self, log_file: str) -> Iterator[dict]:
+        """逐条读取日志文件，返回{op_type, key, vector, metadata/metadata_raw, timestamp}"""
+        if log_file.endswith(".log"):
+            # 旧版本：每行一个JSON（按bytes读取并直接解析，不逐行strip/解码）
+            with open(log_file, "rb", buffering=1 << 20) as f:
+                for line in f:
+                    if line.isspace():
+                        continue
+                    # 容错：跳过损坏的JSON行
+                    try:
+                        yield _json_loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"跳过损坏的WAL日志行：{log_file} -> {line[:50]}...")
+            return
+
+        buf = self._read_segment(log_file)
+        pos, end = 0, len(buf)
+        if log_file.endswith((".wbin", ".wbin.zst")):
+            for pos, log_entry in self._scan_records(buf):
+                yield log_entry
+        else:
+            # 旧版本二进制记录：无magic/CRC，只能按长度判断末尾是否完整
+            while pos + WAL_RECORD_HEADER_V1.size <= end:
+                op, log_ts, key_len, vec_len, meta_len = WAL_RECORD_HEADER_V1.unpack_from(buf, pos)
+                body = pos + WAL_RECORD_HEADER_V1.size
+                record_end = body + key_len + vec_len + meta_len
+                if record_end > end:
+                    break
+                yield self._decode_record(buf, op, log_ts, body, key_len, vec_len, meta_len)
+                pos = record_end
+        if pos < end:
+            logger.warning(f"丢弃WAL末尾不完整/损坏的记录：{log_file}，{end - pos}字节")
+
+    @classmethod
+    def _apply_ops(cls, handler, unique_ops: Dict[str, dict]) -> int:
+        """
+        把去重后的操作批量应用到handler：PUT按WAL_REPLAY_BATCH_SIZE分块put_batch（每块一次add_items + 一次LevelDB批量写），
+        DELETE同样分块delete_batch；每个key只保留最后一次操作，两组key不相交；
+        各组内按时间戳排序后应用（新ID按原写入顺序分配，结果与扫描顺序无关）
+        :param unique_ops: key -> 最后一次操作（排序后即清空，释放去重字典）
+        :return: 应用的操作数
+        """
+        ops = sorted(unique_ops.values(), key=itemgetter("timestamp"))
+        unique_ops.clear()
+        puts = []
+        delete_keys = []
+        for log_entry in ops:
+            if log_entry["op_type"] == "PUT":
+                puts.append(VectorData(
+                    key=log_entry["key"],
+                    vector=log_entry["vector"],
+                    metadata=cls._entry_metadata(log_entry),
+                    timestamp=log_entry["timestamp"]
+                ))
+            elif log_entry["op_type"] == "DELETE":
+                delete_keys.append(log_entry["key"])
+
+        processed = 0
+        # 重放模式：不写入新WAL、不触发快照
+        for op_type, apply, items in (
+            ("PUT", handler.put_batch, puts), ("DELETE", handler.delete_batch, delete_keys)
+        ):
+            for start in range(0, len(items), WAL_REPLAY_BATCH_SIZE):
+                chunk = items[start:start + WAL_REPLAY_BATCH_SIZE]
+                try:
+                    resp = apply(chunk, replay_mode=True)
+                    if not resp.success:
+                        logger.error(f"重放WAL {op_type}部分失败：{resp.message}")
+                    processed += len(chunk)
+                except Exception as e:
+                    logger.error(f"重放WAL {op_type}失败（{len(chunk)}条），错误：{e}")
+        return processed
+
+    def _scan_file(self, log_file: str, min_ts: int) -> tuple:
+        """
+        扫描单个日志文件
+        :param min_ts: 只保留时间戳大于该值的条目
+        :return: (该文件内每个key的最后一次操作, 最大时间戳)；读取出错时返回出错前已读到的条目
+        """
+        local_ops: Dict[str, dict] = {}
+        max_ts = min_ts
+        try:
+            for log_entry in self._iter_log_entries(log_file):
+                if log_entry["timestamp"] <= min_ts:
+                    continue
+                local_ops[log_entry["key"]] = log_entry
+                if log_entry["timestamp"] > max_ts:
+                    max_ts = log_entry["timestamp"]
+        except Exception as e:
+            logger.error(f"读取WAL日志文件失败：{log_file}，错误：{e}")
+        return local_ops, max_ts
+
+    def _scan_files(self, log_files: List[str], min_ts: int = 0) -> tuple:
+        """
+        并发扫描多个日志文件（各文件的读取/解压/解码在线程池中重叠进行），按文件顺序合并：
+        后面文件中的操作覆盖前面文件中同一key的操作，与顺序扫描的去重结果一致
+        :return: (每个key的最后一次操作, 最大时间戳)
+        """
+        unique_ops: Dict[str, dict] = {}
+        max_ts = min_ts
+        if not log_files:
+            return unique_ops, max_ts
+        with ThreadPoolExecutor(max_workers=min(len(log_files), os.cpu_count() or 1)) as pool:
+            for local_ops, local_max_ts in pool.map(lambda f: self._scan_file(f, min_ts), log_files):
+                unique_ops.update(local_ops)
+                max_ts = max(max_ts, local_max_ts)
+        return unique_ops, max_ts
 
     # ========== 核心方法：全量重放WAL ==========
     def replay(self, handler):
@@ -121,60 +494,13 @@ class WALManager:
         
         logger.info(f"开始重放{self.node_id}的全量WAL日志...")
         # 1. 按时间排序所有日志文件
-        log_files = sorted([
-            os.path.join(self.wal_data_dir, f) 
-            for f in os.listdir(self.wal_data_dir) 
-            if f.startswith("wal_") and f.endswith(".log")
-        ])
+        log_files = [os.path.join(self.wal_data_dir, f) for f in self._list_log_files()]
         
         # 2. 内存去重：保留每个key的最后一次操作
-        unique_ops: Dict[str, dict] = {}
-        max_ts = 0
-        
-        for log_file in log_files:
-            try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        # 容错：跳过损坏的JSON行
-                        try:
-                            log_entry = json.loads(line)
-                        except json.JSONDecodeError:
-                            logger.warning(f"跳过损坏的WAL日志行：{log_file} -> {line[:50]}...")
-                            continue
-                        # 更新最新操作
-                        key = log_entry["key"]
-                        unique_ops[key] = log_entry
-                        # 记录最大时间戳
-                        if log_entry["timestamp"] > max_ts:
-                            max_ts = log_entry["timestamp"]
-            except Exception as e:
-                logger.error(f"读取WAL日志文件失败：{log_file}，错误：{e}")
-                continue
+        unique_ops, max_ts = self._scan_files(log_files)
         
         # 3. 执行重放
-        processed = 0
-        for log_entry in unique_ops.values():
-            op_type = log_entry["op_type"]
-            key = log_entry["key"]
-            try:
-                if op_type == "PUT":
-                    data = VectorData(
-                        key=key,
-                        vector=log_entry["vector"],
-                        metadata=log_entry.get("metadata"),
-                        timestamp=log_entry["timestamp"]
-                    )
-                    handler.put(data, replay_mode=True)  # 重放模式：不写入新WAL
-                    logger.debug(f"重放WAL：PUT -> {key}")
-                elif op_type == "DELETE":
-                    handler.delete(key, replay_mode=True)
-                    logger.debug(f"重放WAL：DELETE -> {key}")
-                processed += 1
-            except Exception as e:
-                logger.error(f"重放WAL操作失败：{op_type} -> {key}，错误：{e}")
+        processed = self._apply_ops(handler, unique_ops)
         
         # 4. 标记重放完成 + 保存位点
         self.replayed = True
@@ -185,61 +511,20 @@ class WALManager:
     def replay_incremental(self, handler, checkpoint_ts):
         """重放快照时间戳后的增量WAL日志（节点恢复快照后调用）"""
         logger.info(f"开始重放{self.node_id}的增量WAL日志（快照位点：{checkpoint_ts}）")
-        # 1. 筛选增量日志文件（文件名时间戳 > 快照位点）
-        log_files = [
-            os.path.join(self.wal_data_dir, f) 
-            for f in os.listdir(self.wal_data_dir) 
-            if f.startswith("wal_") and f.endswith(".log") 
-            and int(f.split("_")[1].split(".")[0]) > checkpoint_ts
-        ]
-        log_files = sorted(log_files)
+        # 1. 筛选增量日志文件：文件名时间戳是文件的首条时间，快照前创建的文件也可能包含快照后的操作，
+        #    因此保留最后一个起始时间 ≤ 快照位点的文件及其后的全部文件，条目再按时间戳过滤
+        log_files = self._list_log_files()
+        first = 0
+        for i, f in enumerate(log_files):
+            if self._log_file_ts(f) <= checkpoint_ts:
+                first = i
+        log_files = [os.path.join(self.wal_data_dir, f) for f in log_files[first:]]
         
-        # 2. 内存去重：保留每个key的最后一次增量操作
-        unique_ops: Dict[str, dict] = {}
-        max_ts = checkpoint_ts
-        
-        for log_file in log_files:
-            try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            log_entry = json.loads(line)
-                        except json.JSONDecodeError:
-                            logger.warning(f"跳过损坏的增量WAL日志行：{log_file} -> {line[:50]}...")
-                            continue
-                        # 仅处理快照后的操作
-                        if log_entry["timestamp"] <= checkpoint_ts:
-                            continue
-                        key = log_entry["key"]
-                        unique_ops[key] = log_entry
-                        if log_entry["timestamp"] > max_ts:
-                            max_ts = log_entry["timestamp"]
-            except Exception as e:
-                logger.error(f"读取增量WAL日志文件失败：{log_file}，错误：{e}")
-                continue
+        # 2. 内存去重：保留每个key的最后一次增量操作（仅处理快照后的操作）
+        unique_ops, max_ts = self._scan_files(log_files, checkpoint_ts)
         
         # 3. 执行增量重放
-        processed = 0
-        for log_entry in unique_ops.values():
-            op_type = log_entry["op_type"]
-            key = log_entry["key"]
-            try:
-                if op_type == "PUT":
-                    data = VectorData(
-                        key=key,
-                        vector=log_entry["vector"],
-                        metadata=log_entry.get("metadata"),
-                        timestamp=log_entry["timestamp"]
-                    )
-                    handler.put(data, replay_mode=True)
-                elif op_type == "DELETE":
-                    handler.delete(key, replay_mode=True)
-                processed += 1
-            except Exception as e:
-                logger.error(f"重放增量WAL操作失败：{op_type} -> {key}，错误：{e}")
+        processed = self._apply_ops(handler, unique_ops)
         
         # 4. 更新位点
         self._save_checkpoint_ts(max_ts)
@@ -249,7 +534,6 @@ class WALManager:
     def backup_wal(self, backup_dir: str):
         """备份WAL日志到指定目录"""
         os.makedirs(backup_dir, exist_ok=True)
-        for f in os.listdir(self.wal_data_dir):
-            if f.startswith("wal_") and f.endswith(".log"):
-                shutil.copy2(os.path.join(self.wal_data_dir, f), backup_dir)
+        for f in self._list_log_files():
+            shutil.copy2(os.path.join(self.wal_data_dir, f), backup_dir)
         logger.info(f"WAL日志备份完成，目标目录：{backup_dir}")
\ No newline at end of file
@@ -1,10 +1,15 @@
+import errno
+import selectors
+import socket
 import threading
 import time
 from loguru import logger
 from kazoo.client import KazooClient, KazooState
+from kazoo.exceptions import NodeExistsError
 from Config import (
     ZK_SERVERS, ZK_SESSION_TIMEOUT, ZK_BASE_PATH,
-    ZK_NODES_PATH, ZK_SHARDS_PATH, ZK_SINGLETON_KEY
+    ZK_NODES_PATH, ZK_SHARDS_PATH, ZK_SINGLETON_KEY,
+    ZK_HEALTH_CHECK_INTERVAL, ZK_NODE_REFRESH_DEBOUNCE
 )
 
 # 单例锁
@@ -21,11 +26,27 @@ class ZKManager:
         self.zk.start()
         self._init_zk_paths()
 
+        # 本进程注册的节点：node_id -> address（会话过期后临时节点被删除，重连后由会话监听重新注册）
+        self.registered_nodes = {}
+        self._session_lost = False
+        self.zk.add_listener(self._session_state_change)
+
         # 核心新增：节点列表缓存（实时更新）
+        # 写时复制：更新时整体替换为新字典，读取方直接拿当前引用，无需加锁/拷贝
         self.node_cache = {}
-        self.node_cache_lock = threading.Lock()
+        self.node_cache_lock = threading.Lock()  # 仅串行化写入方
+
+        # 分片映射缓存：shard_id -> 映射（分片节点不存在时为None），首次读取时注册DataWatch，
+        # 之后只在ZK数据变化时更新，路由时不访问ZK
+        self.shard_cache = {}
+        self.shard_cache_lock = threading.Lock()
+        self.shard_watches = set()  # 已注册DataWatch的shard_id
+        self.shard_watch_lock = threading.Lock()  # 串行化注册（DataWatch注册时同步回调会获取shard_cache_lock）
         
-        # 核心新增：监听ZK节点目录变化
+        # 核心新增：监听ZK节点目录变化（变化事件只标记待刷新，由后台线程合并后刷新）
+        self._refresh_pending = threading.Event()
+        self.refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.refresh_thread.start()
         self._watch_nodes()
         
         # 核心新增：定时健康检查（主动检测离线节点）
@@ -45,49 +66,137 @@ class ZKManager:
                 logger.info(f"ZK节点初始化：{path}")
 
     def _watch_nodes(self):
-        """监听ZK节点目录变化（实时更新缓存）"""
-        def _node_change_watcher(event):
-            """节点目录变化回调（新增/删除节点时触发）"""
-            logger.info(f"ZK节点目录变化：{event.type}，重新加载节点列表")
-            self._refresh_node_cache()
-            # 重新注册监听（ZK watch是一次性的，需重新注册）
-            self._watch_nodes()
+        """监听ZK节点目录变化（ChildrenWatch在每次触发后自动重新注册）"""
+        def _node_change_watcher(children):
+            """节点目录变化回调（新增/删除节点时触发）：只标记待刷新，不在ZK事件线程中读ZK"""
+            logger.info(f"ZK节点目录变化：当前子节点数{len(children)}，等待合并刷新节点列表")
+            self._refresh_pending.set()
 
         # 首次加载缓存+注册监听
         self._refresh_node_cache()
-        self.zk.get_children(ZK_NODES_PATH, watch=_node_change_watcher)
+        self.zk.ChildrenWatch(ZK_NODES_PATH, _node_change_watcher)
+
+    def _refresh_loop(self):
+        """合并节点目录变化：收到变化后等待一个去抖窗口，窗口内的后续变化并入同一次刷新"""
+        while True:
+            self._refresh_pending.wait()
+            time.sleep(ZK_NODE_REFRESH_DEBOUNCE)
+            # 先清除再刷新：刷新期间到达的变化会触发下一轮
+            self._refresh_pending.clear()
+            try:
+                self._refresh_node_cache()
+            except Exception as e:
+                logger.error(f"刷新节点缓存失败：{e}")
 
     def _refresh_node_cache(self):
-        """刷新节点缓存（从ZK读取最新列表）"""
+        """刷新节点缓存（从ZK读取最新列表；ZK读取在锁外完成，锁内只替换引用）"""
+        # 各节点的读取请求一次全部发出（同一连接上流水线执行），再逐个等待结果
+        pending = [
+            (node_id, self.zk.get_async(f"{ZK_NODES_PATH}/{node_id}"))
+            for node_id in self.zk.get_children(ZK_NODES_PATH)
+        ]
+        new_cache = {}
+        for node_id, result in pending:
+            try:
+                address, _ = result.get(timeout=ZK_SESSION_TIMEOUT / 1000)
+                new_cache[node_id] = address.decode()
+            except Exception as e:
+                logger.error(f"读取节点{node_id}信息失败：{e}")
         with self.node_cache_lock:
-            self.node_cache.clear()
-            for node_id in self.zk.get_children(ZK_NODES_PATH):
-                node_path = f"{ZK_NODES_PATH}/{node_id}"
-                try:
-                    address, _ = self.zk.get(node_path)
-                    self.node_cache[node_id] = address.decode()
-                except Exception as e:
-                    logger.error(f"读取节点{node_id}信息失败：{e}")
-        logger.info(f"节点缓存已刷新，当前在线节点：{list(self.node_cache.keys())}")
+            changed = new_cache != self.node_cache
+            self.node_cache = new_cache
+        if changed:
+            logger.info(f"节点缓存已刷新，当前在线节点：{list(new_cache.keys())}")
 
-    def _health_check_loop(self):
-        """定时健康检查（主动检测节点是否真的在线）"""
-        import socket
-        while True:
-            time.sleep(5)  # 每5秒检查一次
-            offline_nodes = []
-            with self.node_cache_lock:
-                # 遍历缓存中的节点，检测端口是否可达
-                for node_id, addr in self.node_cache.items():
+    @staticmethod
+    def _probe_nodes(nodes: dict, timeout: float = 2) -> list:
+        """
+        并发探测节点端口是否可达：全部节点同时发起非阻塞connect，统一等待可写，
+        总耗时约为一个超时（而非节点数×超时）
+        :param nodes: node_id -> "host:port"
+        :param timeout: 等待连接建立的超时（秒）
+        :return: 不可达的node_id列表
+        """
+        offline = []
+        sel = selectors.DefaultSelector()
+        try:
+            for node_id, addr in nodes.items():
+                sock = None
+                try:
                     host, port = addr.split(":")
                     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(2)  # 超时2秒
-                    try:
-                        sock.connect((host, int(port)))
+                    sock.setblocking(False)
+                    err = sock.connect_ex((host, int(port)))
+                except (OSError, ValueError):
+                    # 如主机名解析失败（gaierror）：关闭已创建的socket，避免每轮探测泄漏fd
+                    if sock is not None:
                         sock.close()
-                    except:
-                        offline_nodes.append(node_id)
-                        logger.warning(f"健康检查失败：节点{node_id}({addr})离线")
+                    offline.append(node_id)
+                    continue
+                if err == 0:
+                    sock.close()
+                elif err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                    sel.register(sock, selectors.EVENT_WRITE, node_id)
+                else:
+                    sock.close()
+                    offline.append(node_id)
+
+            # 可写即连接完成，SO_ERROR区分成功与失败；超时仍未完成的视为离线
+            deadline = time.monotonic() + timeout
+            while sel.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in sel.select(remaining):
+                    if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+                        offline.append(key.data)
+                    sel.unregister(key.fileobj)
+                    key.fileobj.close()
+            for key in list(sel.get_map().values()):
+                offline.append(key.data)
+                sel.unregister(key.fileobj)
+                key.fileobj.close()
+        finally:
+            sel.close()
+        return offline
+
+    def _session_state_change(self, state):
+        """ZK会话状态回调（在kazoo事件线程中执行，不做阻塞的ZK操作）"""
+        if state == KazooState.LOST:
+            logger.warning("ZK会话已过期，本进程注册的临时节点已被删除，重连后重新注册")
+            self._session_lost = True
+        elif state == KazooState.SUSPENDED:
+            logger.warning("ZK连接中断，等待恢复")
+        elif state == KazooState.CONNECTED and self._session_lost:
+            self._session_lost = False
+            threading.Thread(target=self._reregister_nodes, daemon=True).start()
+
+    def _reregister_nodes(self):
+        """新会话建立后重新创建本进程注册过的临时节点，并刷新节点缓存"""
+        for node_id, address in list(self.registered_nodes.items()):
+            try:
+                self.zk.create(f"{ZK_NODES_PATH}/{node_id}", address.encode(), ephemeral=True)
+                logger.info(f"会话重建后重新注册节点：{node_id} -> {address}")
+            except NodeExistsError:
+                pass
+            except Exception as e:
+                logger.error(f"重新注册节点{node_id}失败：{e}")
+        self._refresh_pending.set()
+
+    def _health_check_loop(self):
+        """定时健康检查（兜底探测节点端口是否可达；上下线主要由ZK临时节点+监听感知）"""
+        while True:
+            time.sleep(ZK_HEALTH_CHECK_INTERVAL)
+            # 兜底：即使watch事件丢失，缓存最多滞后一个检查周期
+            try:
+                self._refresh_node_cache()
+            except Exception as e:
+                logger.error(f"定时刷新节点缓存失败：{e}")
+            # 并发探测缓存快照中的节点端口是否可达（不持锁做网络探测）
+            nodes = self.node_cache
+            offline_nodes = self._probe_nodes(nodes)
+            for node_id in offline_nodes:
+                logger.warning(f"健康检查失败：节点{node_id}({nodes[node_id]})离线")
             
             # 清理离线节点（强制删除ZK临时节点）
             for node_id in offline_nodes:
@@ -96,6 +205,8 @@ class ZKManager:
     def _remove_offline_node(self, node_id: str):
         """强制删除ZK离线节点（加速清理）"""
         node_path = f"{ZK_NODES_PATH}/{node_id}"
+        # 已判定离线的节点不再随会话重建重新注册
+        self.registered_nodes.pop(node_id, None)
         try:
             if self.zk.exists(node_path):
                 self.zk.delete(node_path)
@@ -103,7 +214,9 @@ class ZKManager:
             # 同步清理缓存
             with self.node_cache_lock:
                 if node_id in self.node_cache:
-                    del self.node_cache[node_id]
+                    new_cache = dict(self.node_cache)
+                    del new_cache[node_id]
+                    self.node_cache = new_cache
         except Exception as e:
             logger.error(f"删除离线节点{node_id}失败：{e}")
 
@@ -115,15 +228,17 @@ class ZKManager:
             # 临时节点：会话关闭自动删除
             self.zk.create(node_path, address.encode(), ephemeral=True)
             logger.info(f"节点注册成功：{node_id} -> {address}")
-            # 主动刷新缓存
-            self._refresh_node_cache()
+            # 仅把本节点写入缓存（写时复制），其余变化交由ChildrenWatch刷新
+            with self.node_cache_lock:
+                new_cache = dict(self.node_cache)
+                new_cache[node_id] = address
+                self.node_cache = new_cache
+        self.registered_nodes[node_id] = address
         return True
 
     def get_all_nodes(self):
-        """获取所有在线数据节点（返回缓存，实时更新）"""
-        with self.node_cache_lock:
-            # 返回缓存副本，避免并发修改
-            return self.node_cache.copy()
+        """获取所有在线数据节点（返回当前缓存快照，只读，不访问ZK）"""
+        return self.node_cache
 
     def set_shard_mapping(self, shard_id: int, master_node: str, slave_nodes: list):
         """设置分片-节点映射"""
@@ -134,26 +249,50 @@ class ZKManager:
             self.zk.set(shard_path, mapping.encode())
         else:
             self.zk.create(shard_path, mapping.encode())
+        # 本进程写入后立即更新缓存（不等待DataWatch回调）
+        with self.shard_cache_lock:
+            if shard_id in self.shard_watches:
+                self.shard_cache[shard_id] = {"master": master_node, "slaves": list(slave_nodes)}
         logger.info(f"分片{shard_id}映射更新：主节点={master_node}，副本={slave_nodes}")
 
+    def _on_shard_change(self, shard_id: int, data):
+        """分片节点数据变化（DataWatch回调）：解析一次映射并更新缓存"""
+        import json
+        mapping = json.loads(data.decode()) if data else None
+        with self.shard_cache_lock:
+            self.shard_cache[shard_id] = mapping
+
+    def _get_shard_mapping(self, shard_id: int):
+        """读取分片原始映射（缓存由DataWatch维护，首次读取时注册监听）"""
+        if shard_id not in self.shard_watches:
+            with self.shard_watch_lock:
+                if shard_id not in self.shard_watches:
+                    # 注册时同步回调一次，载入当前数据；节点不存在时等待其创建
+                    self.zk.DataWatch(
+                        f"{ZK_SHARDS_PATH}/{shard_id}",
+                        lambda data, stat, event=None: self._on_shard_change(shard_id, data)
+                    )
+                    self.shard_watches.add(shard_id)
+        return self.shard_cache.get(shard_id)
+
     def get_shard_nodes(self, shard_id: int):
         """获取分片对应的节点"""
-        import json
-        shard_path = f"{ZK_SHARDS_PATH}/{shard_id}"
-        if not self.zk.exists(shard_path):
+        cached = self._get_shard_mapping(shard_id)
+        if cached is None:
             return None
-        mapping = json.loads(self.zk.get(shard_path)[0].decode())
-        # 过滤分片映射中的离线节点
-        with self.node_cache_lock:
-            if mapping["master"] not in self.node_cache:
-                logger.warning(f"分片{shard_id}主节点{mapping['master']}离线，自动切换副本")
-                # 切换到第一个在线副本
-                for slave in mapping["slaves"]:
-                    if slave in self.node_cache:
-                        mapping["master"] = slave
-                        break
-            # 清理离线副本
-            mapping["slaves"] = [s for s in mapping["slaves"] if s in self.node_cache]
+        # 拷贝后再按在线状态过滤，不修改缓存
+        mapping = {"master": cached["master"], "slaves": list(cached["slaves"])}
+        # 过滤分片映射中的离线节点（基于同一份节点快照）
+        online = self.node_cache
+        if mapping["master"] not in online:
+            logger.warning(f"分片{shard_id}主节点{mapping['master']}离线，自动切换副本")
+            # 切换到第一个在线副本
+            for slave in mapping["slaves"]:
+                if slave in online:
+                    mapping["master"] = slave
+                    break
+        # 清理离线副本
+        mapping["slaves"] = [s for s in mapping["slaves"] if s in online]
         return mapping
 
     def close(self):
@@ -164,8 +303,11 @@ class ZKManager:
             logger.info("ZK连接已关闭")
 
 def get_zk_manager() -> ZKManager:
-    """获取单例ZK管理器（连接复用）"""
+    """获取单例ZK管理器（连接复用；创建后直接返回实例，只在首次创建时加锁）"""
     global _zk_instance
+    instance = _zk_instance
+    if instance is not None:
+        return instance
     with _zk_lock:
         if _zk_instance is None:
             _zk_instance = ZKManager()
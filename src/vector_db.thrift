@@ -15,6 +15,8 @@ struct VectorData {
     2: optional list<double> vector,       // 向量值（512维，CLIP生成）
     3: optional map<string, string> metadata,  // 元数据（标签/时间等）
     4: optional i64 timestamp = 0,        // 时间戳（毫秒）
+    5: optional binary packed_vector,     // 字节流编码的向量（float32/float16/int8，设置后优先于vector）
+    6: optional string packed_dtype,      // packed_vector的编码类型：float32/float16/int8，未设置时按float32
 }
 
 /**
@@ -25,6 +27,9 @@ struct SearchRequest {
     2: optional i32 top_k = 5,              // 返回Top-K数量
     3: optional map<string, string> filter, // 过滤条件（如tag=test）
     4: optional double threshold = 0.0,     // 相似度阈值（Faiss距离）
+    5: optional bool include_vectors = true, // 结果是否携带向量值（false时只返回key/分数/元数据）
+    6: optional i32 ef_search,              // HNSW检索EF值（越大召回越高、越慢；不传用节点默认值）
+    7: optional bool packed_vectors,        // 结果向量以float32字节流放在packed_vector中返回（不展开为vector列表）
 }
 
 /**
@@ -46,6 +51,8 @@ struct Response {
     2: optional string message = "",        // 响应信息
     3: optional VectorData vector_data,     // 单个向量结果（get/put）
     4: optional SearchResult search_result, // 检索结果（search）
+    5: optional list<SearchResult> search_results, // 批量检索结果（batch_search，与请求一一对应）
+    6: optional list<string> failed_keys,   // 批量写入中失败的key（put_batch）
 }
 
 // -------------------------- 数据节点服务接口 --------------------------
@@ -84,6 +91,26 @@ service VectorNodeService {
      */
     Response offline(),  // 无参数，返回操作结果
     Response get_all_vectors(),
+
+    /**
+     * 批量写入/更新向量（一次RPC写入多条）
+     */
+    Response put_batch(1: list<VectorData> data_list),
+
+    /**
+     * 批量获取向量（结果在search_result.keys/vectors中，不存在的key跳过）
+     */
+    Response get_batch(1: list<string> keys),
+
+    /**
+     * 批量删除向量（不存在的key跳过）
+     */
+    Response delete_batch(1: list<string> keys),
+
+    /**
+     * 批量检索（多个查询向量一次RPC、一次批量knn_query；结果按请求顺序放在search_results中）
+     */
+    Response batch_search(1: list<SearchRequest> reqs),
 }
 
 // -------------------------- 协调节点服务接口 --------------------------
@@ -117,4 +144,14 @@ service CoordinatorService {
      * 路由检索请求（广播到所有节点+结果合并）
      */
     Response search(1: SearchRequest req),
+
+    /**
+     * 批量路由写入请求：按分片主节点分组，每个主节点一次RPC
+     */
+    Response put_batch(1: list<VectorData> data_list),
+
+    /**
+     * 批量路由删除请求：按分片主节点分组，每个主节点一次RPC
+     */
+    Response delete_batch(1: list<string> keys),
 }
\ No newline at end of file
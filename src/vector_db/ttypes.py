@@ -25,15 +25,19 @@ class VectorData(object):
      - vector
      - metadata
      - timestamp
+     - packed_vector
+     - packed_dtype
 
     """
 
 
-    def __init__(self, key=None, vector=None, metadata=None, timestamp=0,):
+    def __init__(self, key=None, vector=None, metadata=None, timestamp=0, packed_vector=None, packed_dtype=None,):
         self.key = key
         self.vector = vector
         self.metadata = metadata
         self.timestamp = timestamp
+        self.packed_vector = packed_vector
+        self.packed_dtype = packed_dtype
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -75,6 +79,16 @@ class VectorData(object):
                     self.timestamp = iprot.readI64()
                 else:
                     iprot.skip(ftype)
+            elif fid == 5:
+                if ftype == TType.STRING:
+                    self.packed_vector = iprot.readBinary()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.STRING:
+                    self.packed_dtype = iprot.readString().decode('utf-8', errors='replace') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -108,6 +122,14 @@ class VectorData(object):
             oprot.writeFieldBegin('timestamp', TType.I64, 4)
             oprot.writeI64(self.timestamp)
             oprot.writeFieldEnd()
+        if self.packed_vector is not None:
+            oprot.writeFieldBegin('packed_vector', TType.STRING, 5)
+            oprot.writeBinary(self.packed_vector)
+            oprot.writeFieldEnd()
+        if self.packed_dtype is not None:
+            oprot.writeFieldBegin('packed_dtype', TType.STRING, 6)
+            oprot.writeString(self.packed_dtype.encode('utf-8') if sys.version_info[0] == 2 else self.packed_dtype)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -137,15 +159,21 @@ class SearchRequest(object):
      - top_k
      - filter
      - threshold
+     - include_vectors
+     - ef_search
+     - packed_vectors
 
     """
 
 
-    def __init__(self, query_vector=None, top_k=5, filter=None, threshold=0.0000000000000000,):
+    def __init__(self, query_vector=None, top_k=5, filter=None, threshold=0.0000000000000000, include_vectors=True, ef_search=None, packed_vectors=None,):
         self.query_vector = query_vector
         self.top_k = top_k
         self.filter = filter
         self.threshold = threshold
+        self.include_vectors = include_vectors
+        self.ef_search = ef_search
+        self.packed_vectors = packed_vectors
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -187,6 +215,21 @@ class SearchRequest(object):
                     self.threshold = iprot.readDouble()
                 else:
                     iprot.skip(ftype)
+            elif fid == 5:
+                if ftype == TType.BOOL:
+                    self.include_vectors = iprot.readBool()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.I32:
+                    self.ef_search = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 7:
+                if ftype == TType.BOOL:
+                    self.packed_vectors = iprot.readBool()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -220,6 +263,18 @@ class SearchRequest(object):
             oprot.writeFieldBegin('threshold', TType.DOUBLE, 4)
             oprot.writeDouble(self.threshold)
             oprot.writeFieldEnd()
+        if self.include_vectors is not None:
+            oprot.writeFieldBegin('include_vectors', TType.BOOL, 5)
+            oprot.writeBool(self.include_vectors)
+            oprot.writeFieldEnd()
+        if self.ef_search is not None:
+            oprot.writeFieldBegin('ef_search', TType.I32, 6)
+            oprot.writeI32(self.ef_search)
+            oprot.writeFieldEnd()
+        if self.packed_vectors is not None:
+            oprot.writeFieldBegin('packed_vectors', TType.BOOL, 7)
+            oprot.writeBool(self.packed_vectors)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -384,15 +439,19 @@ class Response(object):
      - message
      - vector_data
      - search_result
+     - search_results
+     - failed_keys
 
     """
 
 
-    def __init__(self, success=None, message="", vector_data=None, search_result=None,):
+    def __init__(self, success=None, message="", vector_data=None, search_result=None, search_results=None, failed_keys=None,):
         self.success = success
         self.message = message
         self.vector_data = vector_data
         self.search_result = search_result
+        self.search_results = search_results
+        self.failed_keys = failed_keys
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -425,6 +484,27 @@ class Response(object):
                     self.search_result.read(iprot)
                 else:
                     iprot.skip(ftype)
+            elif fid == 5:
+                if ftype == TType.LIST:
+                    self.search_results = []
+                    (_etype70, _size69) = iprot.readListBegin()
+                    for _i71 in range(_size69):
+                        _elem72 = SearchResult()
+                        _elem72.read(iprot)
+                        self.search_results.append(_elem72)
+                    iprot.readListEnd()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.LIST:
+                    self.failed_keys = []
+                    (_etype77, _size74) = iprot.readListBegin()
+                    for _i78 in range(_size74):
+                        _elem79 = iprot.readString().decode('utf-8', errors='replace') if sys.version_info[0] == 2 else iprot.readString()
+                        self.failed_keys.append(_elem79)
+                    iprot.readListEnd()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -451,6 +531,20 @@ class Response(object):
             oprot.writeFieldBegin('search_result', TType.STRUCT, 4)
             self.search_result.write(oprot)
             oprot.writeFieldEnd()
+        if self.search_results is not None:
+            oprot.writeFieldBegin('search_results', TType.LIST, 5)
+            oprot.writeListBegin(TType.STRUCT, len(self.search_results))
+            for iter73 in self.search_results:
+                iter73.write(oprot)
+            oprot.writeListEnd()
+            oprot.writeFieldEnd()
+        if self.failed_keys is not None:
+            oprot.writeFieldBegin('failed_keys', TType.LIST, 6)
+            oprot.writeListBegin(TType.STRING, len(self.failed_keys))
+            for iter80 in self.failed_keys:
+                oprot.writeString(iter80.encode('utf-8') if sys.version_info[0] == 2 else iter80)
+            oprot.writeListEnd()
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -476,6 +570,8 @@ VectorData.thrift_spec = (
     (2, TType.LIST, 'vector', (TType.DOUBLE, None, False), None, ),  # 2
     (3, TType.MAP, 'metadata', (TType.STRING, 'UTF8', TType.STRING, 'UTF8', False), None, ),  # 3
     (4, TType.I64, 'timestamp', None, 0, ),  # 4
+    (5, TType.STRING, 'packed_vector', 'BINARY', None, ),  # 5
+    (6, TType.STRING, 'packed_dtype', 'UTF8', None, ),  # 6
 )
 all_structs.append(SearchRequest)
 SearchRequest.thrift_spec = (
@@ -484,6 +580,9 @@ SearchRequest.thrift_spec = (
     (2, TType.I32, 'top_k', None, 5, ),  # 2
     (3, TType.MAP, 'filter', (TType.STRING, 'UTF8', TType.STRING, 'UTF8', False), None, ),  # 3
     (4, TType.DOUBLE, 'threshold', None, 0.0000000000000000, ),  # 4
+    (5, TType.BOOL, 'include_vectors', None, True, ),  # 5
+    (6, TType.I32, 'ef_search', None, None, ),  # 6
+    (7, TType.BOOL, 'packed_vectors', None, None, ),  # 7
 )
 all_structs.append(SearchResult)
 SearchResult.thrift_spec = (
@@ -500,6 +599,8 @@ Response.thrift_spec = (
     (2, TType.STRING, 'message', 'UTF8', "", ),  # 2
     (3, TType.STRUCT, 'vector_data', [VectorData, None], None, ),  # 3
     (4, TType.STRUCT, 'search_result', [SearchResult, None], None, ),  # 4
+    (5, TType.LIST, 'search_results', (TType.STRUCT, [SearchResult, None], False), None, ),  # 5
+    (6, TType.LIST, 'failed_keys', (TType.STRING, 'UTF8', False), None, ),  # 6
 )
 fix_spec(all_structs)
 del all_structs